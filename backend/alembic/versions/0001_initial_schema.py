@@ -0,0 +1,93 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("full_name", sa.String()),
+        sa.Column("role", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "samples",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sample_id", sa.String()),
+        sa.Column("patient_name", sa.String()),
+        sa.Column("sample_type", sa.String()),
+        sa.Column("collection_date", sa.Date()),
+        sa.Column("priority", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("assigned_to", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_samples_id", "samples", ["id"])
+    op.create_index("ix_samples_sample_id", "samples", ["sample_id"], unique=True)
+
+    op.create_table(
+        "tests",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("test_name", sa.String()),
+        sa.Column("test_type", sa.String()),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_tests_id", "tests", ["id"])
+
+    op.create_table(
+        "test_results",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sample_id", sa.Integer()),
+        sa.Column("test_id", sa.Integer()),
+        sa.Column("result_value", sa.String()),
+        sa.Column("result_unit", sa.String(), nullable=True),
+        sa.Column("reference_range", sa.String(), nullable=True),
+        sa.Column("performed_by", sa.Integer()),
+        sa.Column("performed_at", sa.DateTime()),
+        sa.Column("status", sa.String()),
+    )
+    op.create_index("ix_test_results_id", "test_results", ["id"])
+
+    op.create_table(
+        "inventory_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("item_name", sa.String()),
+        sa.Column("item_code", sa.String()),
+        sa.Column("category", sa.String()),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("unit", sa.String()),
+        sa.Column("min_threshold", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_inventory_items_id", "inventory_items", ["id"])
+    op.create_index("ix_inventory_items_item_code", "inventory_items", ["item_code"], unique=True)
+
+
+def downgrade():
+    op.drop_table("inventory_items")
+    op.drop_table("test_results")
+    op.drop_table("tests")
+    op.drop_table("samples")
+    op.drop_table("users")
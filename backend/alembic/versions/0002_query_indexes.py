@@ -0,0 +1,53 @@
+"""Composite and partial indexes for the endpoint queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+OPEN_SAMPLES = sa.text("status IN ('pending', 'in_progress')")
+LOW_STOCK = sa.text("quantity <= min_threshold")
+
+
+def _supports_partial_indexes():
+    return op.get_bind().dialect.name in ("postgresql", "sqlite")
+
+
+def upgrade():
+    # GET /samples?status=&assigned_to= and the dashboard status counts
+    op.create_index("ix_samples_status_assigned_to", "samples", ["status", "assigned_to"])
+    # Report date ranges
+    op.create_index("ix_samples_collection_date", "samples", ["collection_date"])
+    # Results of a sample
+    op.create_index("ix_test_results_sample_id", "test_results", ["sample_id"])
+
+    if _supports_partial_indexes():
+        # Technician worklists only ever look at open samples
+        op.create_index(
+            "ix_samples_open_worklist", "samples", ["assigned_to", "priority"],
+            postgresql_where=OPEN_SAMPLES, sqlite_where=OPEN_SAMPLES,
+        )
+        # GET /inventory?low_stock=true and the dashboard low stock count
+        op.create_index(
+            "ix_inventory_items_low_stock", "inventory_items", ["category"],
+            postgresql_where=LOW_STOCK, sqlite_where=LOW_STOCK,
+        )
+
+
+def downgrade():
+    if _supports_partial_indexes():
+        op.drop_index("ix_inventory_items_low_stock", table_name="inventory_items")
+        op.drop_index("ix_samples_open_worklist", table_name="samples")
+    op.drop_index("ix_test_results_sample_id", table_name="test_results")
+    op.drop_index("ix_samples_collection_date", table_name="samples")
+    op.drop_index("ix_samples_status_assigned_to", table_name="samples")
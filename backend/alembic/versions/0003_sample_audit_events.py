@@ -0,0 +1,41 @@
+"""Append-only sample audit events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sample_audit_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sample_id", sa.Integer()),
+        sa.Column("field", sa.String()),
+        sa.Column("old_value", sa.Text(), nullable=True),
+        sa.Column("new_value", sa.Text(), nullable=True),
+        sa.Column("changed_by", sa.Integer(), nullable=True),
+        sa.Column("changed_at", sa.DateTime()),
+    )
+    # GET /samples/{id}/history
+    op.create_index(
+        "ix_sample_audit_events_sample_id_changed_at", "sample_audit_events", ["sample_id", "changed_at"]
+    )
+    # Time-window audit queries
+    op.create_index("ix_sample_audit_events_changed_at", "sample_audit_events", ["changed_at"])
+
+
+def downgrade():
+    op.drop_index("ix_sample_audit_events_changed_at", table_name="sample_audit_events")
+    op.drop_index("ix_sample_audit_events_sample_id_changed_at", table_name="sample_audit_events")
+    op.drop_table("sample_audit_events")
@@ -0,0 +1,28 @@
+"""Block-allocated id sequences
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "id_sequences",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("next_value", sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("id_sequences")
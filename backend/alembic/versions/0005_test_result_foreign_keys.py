@@ -0,0 +1,32 @@
+"""Foreign keys from test results to samples and tests
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tests of a batch of results (GET /samples/full)
+    op.create_index("ix_test_results_test_id", "test_results", ["test_id"])
+    # Batch mode so SQLite, which cannot add constraints in place, rebuilds the table
+    with op.batch_alter_table("test_results") as batch_op:
+        batch_op.create_foreign_key("fk_test_results_sample_id", "samples", ["sample_id"], ["id"])
+        batch_op.create_foreign_key("fk_test_results_test_id", "tests", ["test_id"], ["id"])
+
+
+def downgrade():
+    with op.batch_alter_table("test_results") as batch_op:
+        batch_op.drop_constraint("fk_test_results_test_id", type_="foreignkey")
+        batch_op.drop_constraint("fk_test_results_sample_id", type_="foreignkey")
+    op.drop_index("ix_test_results_test_id", table_name="test_results")
@@ -0,0 +1,204 @@
+import math
+from datetime import date, datetime, time, timedelta
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from timestamps import naive_local
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch with bounded relative error.
+
+    Values are counted in logarithmic buckets (DDSketch style), so any
+    quantile is returned within relative_accuracy of the true value, two
+    sketches merge by adding bucket counts, and memory depends only on the
+    range of values seen, never on how many were added.
+    """
+
+    __slots__ = ("relative_accuracy", "max_bins", "_gamma", "_log_gamma",
+                 "bins", "zero_count", "count", "total", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: "QuantileSketch"):
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        # Fold the lowest buckets together; only the smallest values lose accuracy
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins + 1
+        folded = sum(self.bins.pop(key) for key in keys[:excess])
+        target = keys[excess]
+        self.bins[target] += folded
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return max(self.min, 0.0)
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                value = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+def _floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class TurnaroundTracker:
+    """Turnaround-time sketches per (test type, priority) in hourly and daily buckets.
+
+    A window is answered by merging whole-day sketches plus the hourly
+    sketches at its edges, so the cost depends on the window length in days,
+    not on how many results it contains. Hourly buckets older than
+    hourly_retention are dropped; edges that old are widened to whole days.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, hourly_retention: timedelta = timedelta(days=14)):
+        self.relative_accuracy = relative_accuracy
+        self.hourly_retention = hourly_retention
+        self._lock = Lock()
+        self._all: Dict[Tuple[str, str], QuantileSketch] = {}
+        self._daily: Dict[date, Dict[Tuple[str, str], QuantileSketch]] = {}
+        self._hourly: Dict[datetime, Dict[Tuple[str, str], QuantileSketch]] = {}
+        self._latest_hour: Optional[datetime] = None
+
+    def _sketch(self, buckets: dict, group: Tuple[str, str]) -> QuantileSketch:
+        sketch = buckets.get(group)
+        if sketch is None:
+            sketch = buckets[group] = QuantileSketch(self.relative_accuracy)
+        return sketch
+
+    def record(self, test_type: str, priority: str, collected_at: datetime, completed_at: datetime):
+        """Add one completed result; turnaround is measured in hours"""
+        hours = (completed_at - collected_at) / HOUR
+        group = (test_type, priority)
+        hour = _floor_hour(completed_at)
+        with self._lock:
+            self._sketch(self._all, group).add(hours)
+            self._sketch(self._daily.setdefault(hour.date(), {}), group).add(hours)
+            if hour not in self._hourly:
+                self._hourly[hour] = {}
+                if self._latest_hour is None or hour > self._latest_hour:
+                    self._latest_hour = hour
+                    self._prune_hourly()
+            self._sketch(self._hourly[hour], group).add(hours)
+
+    def _prune_hourly(self):
+        cutoff = self._latest_hour - self.hourly_retention
+        for hour in [h for h in self._hourly if h < cutoff]:
+            del self._hourly[hour]
+
+    def _window_buckets(self, start: datetime, end: datetime) -> Iterable[dict]:
+        """Split [start, end) into daily and hourly buckets"""
+        cutoff = self._latest_hour - self.hourly_retention if self._latest_hour else None
+        moment = _floor_hour(start)
+        while moment < end:
+            day_start = datetime.combine(moment.date(), time())
+            whole_day = moment == day_start and moment + DAY <= end
+            if whole_day or (cutoff is not None and moment < cutoff):
+                yield self._daily.get(moment.date(), {})
+                moment = day_start + DAY
+            else:
+                yield self._hourly.get(moment, {})
+                moment += HOUR
+
+    def merged(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[Tuple[str, str], QuantileSketch]:
+        """Merge the sketches of every group over [start, end); all time if no bounds"""
+        with self._lock:
+            if start is None and end is None:
+                buckets: List[dict] = [self._all]
+            elif not self._daily:
+                buckets = []
+            else:
+                # Nothing lies outside the recorded span, so clamp to it; this also keeps
+                # far-off bounds (up to datetime.max) from overflowing or walking empty days
+                first = datetime.combine(min(self._daily), time())
+                last = self._latest_hour + HOUR
+                start = first if start is None else max(naive_local(start), first)
+                end = last if end is None else min(naive_local(end), last)
+                buckets = list(self._window_buckets(start, end))
+            merged: Dict[Tuple[str, str], QuantileSketch] = {}
+            for bucket in buckets:
+                for group, sketch in bucket.items():
+                    self._sketch(merged, group).merge(sketch)
+        return merged
+
+    def summary(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                test_type: Optional[str] = None, priority: Optional[str] = None,
+                quantiles: Iterable[float] = (0.5, 0.9, 0.99)) -> dict:
+        """Percentiles overall, per test type and per priority within a window"""
+        quantiles = tuple(quantiles)
+        overall = QuantileSketch(self.relative_accuracy)
+        by_type: Dict[str, QuantileSketch] = {}
+        by_priority: Dict[str, QuantileSketch] = {}
+        for (group_type, group_priority), sketch in self.merged(start, end).items():
+            if test_type and group_type != test_type:
+                continue
+            if priority and group_priority != priority:
+                continue
+            overall.merge(sketch)
+            self._sketch(by_type, group_type).merge(sketch)
+            self._sketch(by_priority, group_priority).merge(sketch)
+        return {
+            "overall": _describe(overall, quantiles),
+            "by_test_type": {key: _describe(s, quantiles) for key, s in sorted(by_type.items())},
+            "by_priority": {key: _describe(s, quantiles) for key, s in sorted(by_priority.items())},
+        }
+
+
+def _describe(sketch: QuantileSketch, quantiles: Tuple[float, ...]) -> dict:
+    return {
+        "count": sketch.count,
+        "mean_hours": sketch.mean,
+        **{f"p{q * 100:g}": sketch.quantile(q) for q in quantiles},
+    }
+
+
+# Process-wide turnaround statistics, fed as results complete
+turnaround_tracker = TurnaroundTracker()
@@ -0,0 +1,201 @@
+import copy
+import itertools
+import json
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from threading import Lock, Thread
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from timestamps import from_micros, to_micros
+
+# Bookkeeping fields that change on every write and are not worth auditing
+UNAUDITED_FIELDS = {"updated_at"}
+
+NO_USER = -1
+
+logger = logging.getLogger(__name__)
+
+# Keys for values with no canonical form, so each one gets a code of its own
+_unshared = itertools.count()
+
+
+def diff_fields(current: dict, updates: dict) -> Dict[str, Tuple[Any, Any]]:
+    """Return {field: (old, new)} for the updates that actually change a record"""
+    return {
+        field: (current.get(field), value)
+        for field, value in updates.items()
+        if field not in UNAUDITED_FIELDS and current.get(field) != value
+    }
+
+
+class SampleAuditLog:
+    """Append-only, column-oriented log of field-level sample changes.
+
+    Each event is one slot in a set of parallel int64 arrays (sample id, time,
+    user, field, old value, new value). Field names and values are interned so
+    repeated statuses, priorities and user ids cost one integer per event.
+    Events are kept in time order, so time windows are a binary search, and
+    each sample keeps the positions of its own events for history lookups.
+
+    Writers only append the raw change set to a staging list; it is moved into
+    the columns on the next read, or by a background thread once
+    flush_threshold writes are staged, so no writer ever does the column work.
+    """
+
+    def __init__(self, flush_threshold: int = 4096):
+        self.flush_threshold = flush_threshold
+        # _lock guards only the staging list; _columns_lock the columns and interning tables
+        self._lock = Lock()
+        self._columns_lock = Lock()
+        self._flush_scheduled = False
+        # Staged writes that could not be encoded; kept here (and logged) rather than dropped
+        self.rejected: List[Tuple[datetime, Optional[int], list]] = []
+        self._pending: List[Tuple[datetime, Optional[int], list]] = []
+        self._sample_ids = array("q")
+        self._timestamps = array("q")
+        self._users = array("q")
+        self._fields = array("q")
+        self._old_values = array("q")
+        self._new_values = array("q")
+        self._by_sample: Dict[int, array] = {}
+        self._field_names: List[str] = []
+        self._field_codes: Dict[str, int] = {}
+        self._values: List[Any] = []
+        self._value_codes: Dict[Tuple[type, Any], int] = {}
+
+    def __len__(self):
+        with self._columns_lock:
+            self._flush()
+            return len(self._timestamps)
+
+    def _field_code(self, field: str) -> int:
+        code = self._field_codes.get(field)
+        if code is None:
+            code = self._field_codes[field] = len(self._field_names)
+            self._field_names.append(field)
+        return code
+
+    @staticmethod
+    def _value_key(value: Any) -> Tuple[type, Any]:
+        # Keyed by type so that 1, 1.0 and True stay distinct
+        key = (type(value), value)
+        try:
+            hash(key)
+        except TypeError:
+            # Lists, dicts and other unhashable values are interned by a canonical JSON form
+            try:
+                key = (type(value), json.dumps(value, sort_keys=True, default=str))
+            except ValueError:
+                # e.g. a structure that contains itself: never shared with another value
+                key = (type(value), ("unshared", next(_unshared)))
+        return key
+
+    def _value_code(self, value: Any) -> int:
+        key = self._value_key(value)
+        code = self._value_codes.get(key)
+        if code is None:
+            code = self._value_codes[key] = len(self._values)
+            # A snapshot, so later mutation of a stored list or dict cannot rewrite history
+            self._values.append(value if key[1] is value else copy.deepcopy(value))
+        return code
+
+    def record(self, sample_id: int, changes: Dict[str, Tuple[Any, Any]],
+               user_id: Optional[int] = None, when: Optional[datetime] = None):
+        """Append the field changes made to one sample"""
+        self.record_many([(sample_id, changes)], user_id, when)
+
+    def record_many(self, entries: Iterable[Tuple[int, Dict[str, Tuple[Any, Any]]]],
+                    user_id: Optional[int] = None, when: Optional[datetime] = None):
+        """Append the changes of several samples made by one user at one moment"""
+        with self._lock:
+            self._pending.append((when or datetime.now(), user_id, list(entries)))
+            schedule = len(self._pending) >= self.flush_threshold and not self._flush_scheduled
+            if schedule:
+                self._flush_scheduled = True
+        if schedule:
+            Thread(target=self.flush, name="audit-flush", daemon=True).start()
+
+    def flush(self):
+        """Move staged writes into the columns"""
+        with self._columns_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._flush_scheduled = False
+        for when, user_id, entries in pending:
+            try:
+                self._append(to_micros(when), NO_USER if user_id is None else int(user_id), entries)
+            except Exception:
+                # Never drop an audit write; it may run on the background flush thread, so log it too
+                self.rejected.append((when, user_id, entries))
+                logger.exception("Audit write by user %s at %s could not be recorded: %r", user_id, when, entries)
+
+    def _append(self, timestamp: int, user: int, entries: list):
+        # Keep the time column sorted even if the clock steps backwards
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            timestamp = self._timestamps[-1]
+        # Encode every event before touching a column, so a bad value cannot leave them uneven
+        rows = [
+            (int(sample_id), self._field_code(field), self._value_code(old), self._value_code(new))
+            for sample_id, changes in entries
+            for field, (old, new) in (changes or {}).items()
+        ]
+        for sample_id, field, old, new in rows:
+            positions = self._by_sample.get(sample_id)
+            if positions is None:
+                positions = self._by_sample[sample_id] = array("q")
+            positions.append(len(self._timestamps))
+            self._sample_ids.append(sample_id)
+            self._timestamps.append(timestamp)
+            self._users.append(user)
+            self._fields.append(field)
+            self._old_values.append(old)
+            self._new_values.append(new)
+
+    def _event(self, position: int) -> dict:
+        user = self._users[position]
+        return {
+            "sample_id": self._sample_ids[position],
+            "field": self._field_names[self._fields[position]],
+            "old_value": self._values[self._old_values[position]],
+            "new_value": self._values[self._new_values[position]],
+            "changed_by": None if user == NO_USER else user,
+            "changed_at": from_micros(self._timestamps[position]),
+        }
+
+    def history(self, sample_id: int, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, limit: Optional[int] = None) -> List[dict]:
+        """Changes of one sample, oldest first, optionally within [start, end]"""
+        with self._columns_lock:
+            self._flush()
+            positions = self._by_sample.get(sample_id)
+            if not positions:
+                return []
+            # Positions are increasing and so are their timestamps
+            lo, hi = 0, len(positions)
+            if start is not None:
+                lo = bisect_left(positions, bisect_left(self._timestamps, to_micros(start)))
+            if end is not None:
+                hi = bisect_left(positions, bisect_right(self._timestamps, to_micros(end)))
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [self._event(positions[i]) for i in range(lo, hi)]
+
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               limit: Optional[int] = None) -> List[dict]:
+        """Changes of all samples within [start, end], oldest first"""
+        with self._columns_lock:
+            self._flush()
+            lo = 0 if start is None else bisect_left(self._timestamps, to_micros(start))
+            hi = len(self._timestamps) if end is None else bisect_right(self._timestamps, to_micros(end))
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [self._event(i) for i in range(lo, hi)]
+
+
+# Process-wide audit log for the in-memory sample store
+sample_audit = SampleAuditLog()
@@ -0,0 +1,71 @@
+"""Write-path overhead, memory per event and query latency of the sample audit log.
+
+Run from the backend directory:
+
+    python benchmarks/bench_audit.py [events]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audit import SampleAuditLog, diff_fields
+
+STATUSES = ("pending", "in_progress", "completed", "cancelled")
+
+
+def _timed_updates(payloads, log=None):
+    sample = {"id": 1, "status": "pending", "assigned_to": None, "priority": "normal"}
+    start = time.perf_counter()
+    for payload in payloads:
+        changes = diff_fields(sample, payload) if log is not None else None
+        sample.update(payload)
+        sample["updated_at"] = now = datetime.now()
+        if log is not None:
+            log.record(1, changes, 2, now)
+    return (time.perf_counter() - start) / len(payloads)
+
+
+def bench_write_path(updates=200_000):
+    """Time an in-place sample update with and without auditing"""
+    payloads = [{"status": STATUSES[i % 4], "assigned_to": i % 50} for i in range(updates)]
+    plain = _timed_updates(payloads)
+    staged = _timed_updates(payloads, SampleAuditLog(flush_threshold=updates + 1))
+    amortized = _timed_updates(payloads, SampleAuditLog())
+    print(f"update without audit           {plain * 1e6:7.2f} us")
+    print(f"update with audit (staging)    {staged * 1e6:7.2f} us")
+    print(f"update with audit (amortized)  {amortized * 1e6:7.2f} us")
+
+
+def bench_queries(events):
+    rng = random.Random(7)
+    samples = max(events // 10, 1)
+    log = SampleAuditLog()
+    start_time = datetime(2026, 1, 1)
+    tracemalloc.start()
+    for i in range(events):
+        log.record(rng.randrange(samples), {"status": (rng.choice(STATUSES), rng.choice(STATUSES))},
+                   rng.randrange(50), start_time + timedelta(seconds=i))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\nevents={events} samples={samples} memory={current / events:.1f} B/event")
+
+    start = time.perf_counter()
+    for sample_id in range(1000):
+        log.history(sample_id)
+    print(f"history of one sample    {(time.perf_counter() - start) / 1000 * 1e6:8.1f} us")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        moment = start_time + timedelta(seconds=rng.randrange(events))
+        log.window(moment, moment + timedelta(minutes=10), limit=1000)
+    print(f"10 minute window         {(time.perf_counter() - start) / 1000 * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    bench_write_path()
+    bench_queries(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,45 @@
+"""Per-transaction cost and full-catalogue forecast latency of the consumption forecaster.
+
+Run from the backend directory:
+
+    python benchmarks/bench_forecast.py [items] [days]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forecasting import ConsumptionForecaster
+
+
+def main(items, days, per_day=5):
+    rng = random.Random(11)
+    forecaster = ConsumptionForecaster()
+    catalogue = [
+        {"id": i, "item_code": f"IT{i:06d}", "item_name": f"Item {i}",
+         "quantity": rng.randrange(0, 5000), "min_threshold": 50}
+        for i in range(items)
+    ]
+    origin = datetime(2026, 1, 1)
+    transactions = 0
+    start = time.perf_counter()
+    for day in range(days):
+        moment = origin + timedelta(days=day)
+        for _ in range(items * per_day // 10):
+            forecaster.observe(rng.randrange(items), -rng.randrange(1, 20), moment)
+            transactions += 1
+    ingest = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forecasts = forecaster.forecast(catalogue, today=(origin + timedelta(days=days - 1)).date())
+    elapsed = time.perf_counter() - start
+    at_risk = sum(1 for f in forecasts if f["reorder_now"])
+    print(f"items={items} transactions={transactions} observe {ingest / transactions * 1e6:.2f} us/transaction")
+    print(f"forecast for all items {elapsed * 1000:.1f} ms ({at_risk} to reorder)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000, int(sys.argv[2]) if len(sys.argv) > 2 else 90)
@@ -0,0 +1,115 @@
+"""EXPLAIN QUERY PLAN and timings for the endpoint queries before and after the
+index migration (alembic revision 0002), on synthetic SQLite data.
+
+Run from the backend directory:
+
+    python benchmarks/bench_query_plans.py [samples]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(), "labtrack_bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+
+QUERIES = {
+    "samples by status+assignee": (
+        "SELECT * FROM samples WHERE status = ? AND assigned_to = ?", ("in_progress", 7)),
+    "samples by collection range": (
+        "SELECT * FROM samples WHERE collection_date BETWEEN ? AND ?", ("2026-03-01", "2026-03-07")),
+    "open worklist": (
+        "SELECT * FROM samples WHERE status IN ('pending', 'in_progress') AND assigned_to = ? "
+        "ORDER BY priority", (7,)),
+    "status counts": (
+        "SELECT status, count(*) FROM samples GROUP BY status", ()),
+    "results of a sample": (
+        "SELECT * FROM test_results WHERE sample_id = ?", (12345,)),
+    "low stock inventory": (
+        "SELECT * FROM inventory_items WHERE quantity <= min_threshold", ()),
+}
+
+
+def alembic_config():
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+def seed(conn, samples):
+    rng = random.Random(42)
+    statuses = ("pending", "in_progress", "completed", "cancelled")
+    priorities = ("low", "normal", "high", "urgent")
+    start = date(2026, 1, 1)
+    now = datetime.now().isoformat(sep=" ")
+    conn.executemany(
+        "INSERT INTO samples (id, sample_id, patient_name, sample_type, collection_date, priority, "
+        "status, assigned_to, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i, f"SAMP{i:08d}", f"Patient {i}", rng.choice(("blood", "urine", "tissue")),
+             (start + timedelta(days=rng.randrange(300))).isoformat(), rng.choice(priorities),
+             rng.choices(statuses, weights=(10, 10, 75, 5))[0], rng.randrange(1, 50), now, now)
+            for i in range(1, samples + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO test_results (sample_id, test_id, result_value, performed_by, performed_at, status) "
+        "VALUES (?, ?, ?, ?, ?, 'completed')",
+        ((rng.randrange(1, samples + 1), rng.randrange(1, 40), "4.2", rng.randrange(1, 50), now)
+         for _ in range(samples * 3)),
+    )
+    conn.executemany(
+        "INSERT INTO inventory_items (item_name, item_code, category, quantity, unit, min_threshold, "
+        "created_at, updated_at) VALUES (?, ?, ?, ?, 'pieces', 50, ?, ?)",
+        ((f"Item {i}", f"IT{i:06d}", rng.choice(("consumables", "reagents", "supplies")),
+          rng.randrange(0, 50) if rng.random() < 0.02 else rng.randrange(51, 5000), now, now)
+         for i in range(samples // 10)),
+    )
+    conn.commit()
+
+
+def run_queries(conn, label, repeat=5):
+    print(f"\n== {label} ==")
+    timings = {}
+    for name, (sql, params) in QUERIES.items():
+        plan = "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name:30s} {best * 1000:9.2f} ms  {plan}")
+    return timings
+
+
+def main(samples):
+    config = alembic_config()
+    command.upgrade(config, "0001")
+    conn = sqlite3.connect(DB_PATH)
+    seed(conn, samples)
+    conn.execute("ANALYZE")
+    before = run_queries(conn, f"revision 0001, {samples} samples")
+
+    conn.close()
+    command.upgrade(config, "0002")
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("ANALYZE")
+    after = run_queries(conn, f"revision 0002, {samples} samples")
+    conn.close()
+
+    print("\n== speedup ==")
+    for name in QUERIES:
+        print(f"{name:30s} {before[name] / after[name]:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
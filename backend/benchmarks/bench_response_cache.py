@@ -0,0 +1,47 @@
+"""Shift-start burst: many identical concurrent /dashboard/stats requests,
+with and without the coalescing cache.
+
+Run from the backend directory:
+
+    python benchmarks/bench_response_cache.py [samples] [concurrent]
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import main
+from bench_sparse_fields import HEADERS, seed_samples
+
+
+async def burst(concurrent):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get("/dashboard/stats", headers=HEADERS) for _ in range(concurrent)))
+        return time.perf_counter() - start
+
+
+def run(samples, concurrent):
+    seed_samples(samples)
+    main.response_cache.ttl = 0
+    main.response_cache.get_or_compute = _uncached
+    uncached = asyncio.run(burst(concurrent))
+    del main.response_cache.get_or_compute
+    main.response_cache.ttl = 5
+    cached = asyncio.run(burst(concurrent))
+    print(f"samples={samples} concurrent={concurrent}")
+    print(f"without coalescing {uncached * 1000:8.1f} ms")
+    print(f"with coalescing    {cached * 1000:8.1f} ms  {main.response_cache.stats()['/dashboard/stats']}")
+
+
+async def _uncached(route, params, role, compute):
+    return compute()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
@@ -0,0 +1,141 @@
+"""Latency of the joined sample view: per-entity lookups (N+1) vs the batched
+/samples/full endpoint, in memory and on SQLite, as the page grows.
+
+Run from the backend directory:
+
+    python benchmarks/bench_sample_full.py [samples] [results_per_sample]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(), "labtrack_bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+import database
+import main
+from loaders import database_loaders
+
+HEADERS = {"Authorization": "Bearer bench-token"}
+PAGE_SIZES = (10, 50, 200, 500)
+TESTS = 50
+
+
+def seed_rows(samples, per_sample):
+    now = datetime.now()
+    sample_rows = [
+        {
+            "id": i,
+            "sample_id": f"SAMP{i:07d}",
+            "patient_name": f"Patient {i}",
+            "sample_type": ("blood", "urine", "tissue")[i % 3],
+            "collection_date": date.today(),
+            "priority": "normal",
+            "status": "in_progress",
+            "assigned_to": 2,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, samples + 1)
+    ]
+    test_rows = [
+        {"id": i, "test_name": f"Test {i}", "test_type": "biochemistry", "description": None, "created_at": now}
+        for i in range(1, TESTS + 1)
+    ]
+    result_rows = [
+        {
+            "id": (s - 1) * per_sample + k + 1,
+            "sample_id": s,
+            "test_id": (s + k) % TESTS + 1,
+            "result_value": str(k),
+            "result_unit": "mg/dL",
+            "reference_range": None,
+            "performed_by": 2,
+            "performed_at": now,
+            "status": "completed",
+        }
+        for s in range(1, samples + 1)
+        for k in range(per_sample)
+    ]
+    return sample_rows, test_rows, result_rows
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_api(sample_rows, test_rows, result_rows):
+    main.mock_samples.clear()
+    main.mock_samples.extend(sample_rows)
+    main.mock_tests[:] = test_rows
+    main.mock_test_results[:] = result_rows
+    main.mock_results_by_sample.clear()
+    for row in result_rows:
+        main.mock_results_by_sample[row["sample_id"]].append(row)
+    client = TestClient(main.app)
+
+    def one_by_one(ids):
+        # What the UI did before: the sample list, then results per sample, then the tests
+        client.get("/samples", headers=HEADERS)
+        for sample_id in ids:
+            client.get(f"/results?sample_id={sample_id}", headers=HEADERS)
+        client.get("/tests", headers=HEADERS)
+
+    print("in-memory API")
+    for page in PAGE_SIZES:
+        ids = list(range(1, page + 1))
+        naive = best_of(lambda: one_by_one(ids), repeat=3)
+        batched = best_of(lambda: client.get(f"/samples/full?ids={','.join(map(str, ids))}", headers=HEADERS))
+        print(f"  page={page:4d}  N+1 {naive * 1000:8.1f} ms  batched {batched * 1000:7.1f} ms")
+
+
+def bench_sqlite(sample_rows, test_rows, result_rows):
+    database.create_tables()
+    with database.engine.begin() as connection:
+        connection.execute(insert(database.Sample), sample_rows)
+        connection.execute(insert(database.Test), test_rows)
+        connection.execute(insert(database.TestResult), result_rows)
+
+    statements = []
+    event.listen(database.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    db = database.SessionLocal()
+
+    def one_by_one(ids):
+        for sample_id in ids:
+            database.fetch_fields(db, database.Sample, database.Sample.id == sample_id)
+            results = database.fetch_fields(db, database.TestResult, database.TestResult.sample_id == sample_id)
+            for result in results:
+                db.execute(select(database.Test).where(database.Test.id == result["test_id"])).first()
+
+    print("sqlite")
+    for page in PAGE_SIZES:
+        ids = list(range(1, page + 1))
+        statements.clear()
+        naive = best_of(lambda: one_by_one(ids), repeat=1)
+        naive_queries = len(statements)
+        statements.clear()
+        batched = best_of(lambda: asyncio.run(database_loaders(db).load_full(ids)), repeat=1)
+        print(f"  page={page:4d}  N+1 {naive * 1000:8.1f} ms ({naive_queries:5d} queries)  "
+              f"batched {batched * 1000:7.1f} ms ({len(statements)} queries)")
+    db.close()
+
+
+if __name__ == "__main__":
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    per_sample = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    rows = seed_rows(samples, per_sample)
+    bench_api(*rows)
+    bench_sqlite(*rows)
@@ -0,0 +1,79 @@
+"""Memory per sample and query latency of the dict and compact sample stores.
+
+Run from the backend directory:
+
+    python benchmarks/bench_sample_memory.py [rows ...]
+
+The compact store is loaded in chunks, so 10M rows fit in a few GB; the dict
+store is skipped above --max-dict-rows (default 2M) as it needs ~550 B/row.
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sample_store import make_sample_store
+
+CHUNK = 100_000
+
+
+def sample_chunk(start, count):
+    now = datetime(2026, 10, 19, 8)
+    return [
+        {
+            "id": i,
+            "sample_id": f"SAMP{i:08d}",
+            "patient_name": f"Patient {i}",
+            "sample_type": ("blood", "urine", "tissue", "swab")[i % 4],
+            "collection_date": date(2026, 1, 1) + timedelta(days=i % 300),
+            "priority": ("low", "normal", "high", "urgent")[i % 4],
+            "status": ("pending", "in_progress", "completed", "cancelled")[i % 4],
+            "assigned_to": None if i % 5 == 0 else i % 50,
+            "created_at": now + timedelta(seconds=i),
+            "updated_at": now + timedelta(seconds=i),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def measure(mode, rows):
+    gc.collect()
+    tracemalloc.start()
+    store = make_sample_store(mode=mode)
+    for start in range(1, rows + 1, CHUNK):
+        store.extend(sample_chunk(start, min(CHUNK, rows + 1 - start)))
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    store.count_by("status")
+    counts = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = store.filter(status="in_progress", assigned_to=7)
+    filtered = time.perf_counter() - start
+    start = time.perf_counter()
+    store.find(rows // 2)
+    found = time.perf_counter() - start
+
+    print(f"{mode:8s} rows={rows:>10,} {used / rows:7.1f} B/sample  total {used / 2**20:8.1f} MiB  "
+          f"count_by {counts * 1000:7.1f} ms  filter {filtered * 1000:7.1f} ms ({len(matches)})  "
+          f"find {found * 1e6:8.1f} us")
+    del store
+
+
+if __name__ == "__main__":
+    max_dict_rows = 2_000_000
+    args = sys.argv[1:]
+    if "--max-dict-rows" in args:
+        i = args.index("--max-dict-rows")
+        max_dict_rows = int(args[i + 1])
+        del args[i:i + 2]
+    for rows in [int(a) for a in args] or [1_000_000, 10_000_000]:
+        if rows <= max_dict_rows:
+            measure("dict", rows)
+        measure("compact", rows)
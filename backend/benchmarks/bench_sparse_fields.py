@@ -0,0 +1,64 @@
+"""Payload size and latency of full vs sparse (?fields=) sample listings.
+
+Run from the backend directory:
+
+    python benchmarks/bench_sparse_fields.py [rows]
+"""
+import os
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+
+HEADERS = {"Authorization": "Bearer bench-token"}
+
+
+def seed_samples(rows):
+    now = datetime.now()
+    main.mock_samples.clear()
+    main.mock_samples.extend([
+        {
+            "id": i,
+            "sample_id": f"SAMP{i:07d}",
+            "patient_name": f"Patient {i}",
+            "sample_type": ("blood", "urine", "tissue")[i % 3],
+            "collection_date": date.today(),
+            "priority": ("low", "normal", "high", "urgent")[i % 4],
+            "status": ("pending", "in_progress", "completed")[i % 3],
+            "assigned_to": 2,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, rows + 1)
+    ])
+
+
+def measure(client, url, repeat=5):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=HEADERS)
+        best = min(best, time.perf_counter() - start)
+        size = len(response.content)
+    return best, size
+
+
+def main_bench(rows):
+    seed_samples(rows)
+    client = TestClient(main.app)
+    full_time, full_size = measure(client, "/samples")
+    sparse_time, sparse_size = measure(client, "/samples?fields=sample_id,status,priority")
+    print(f"rows={rows}")
+    print(f"full    {full_time * 1000:8.1f} ms  {full_size / 1024:10.1f} KiB")
+    print(f"sparse  {sparse_time * 1000:8.1f} ms  {sparse_size / 1024:10.1f} KiB")
+    print(f"payload -{(1 - sparse_size / full_size) * 100:.0f}%  latency -{(1 - sparse_time / full_time) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main_bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,49 @@
+"""Ingest rate, query latency and accuracy of the turnaround percentile sketches.
+
+Run from the backend directory:
+
+    python benchmarks/bench_turnaround.py [results]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import TurnaroundTracker
+
+TEST_TYPES = ("hematology", "biochemistry", "microbiology", "immunology", "molecular")
+PRIORITIES = ("low", "normal", "high", "urgent")
+
+
+def main(results, days=60):
+    rng = random.Random(3)
+    tracker = TurnaroundTracker()
+    origin = datetime(2026, 1, 1)
+    exact = []
+    start = time.perf_counter()
+    for i in range(results):
+        completed = origin + timedelta(seconds=i * days * 86400 // results)
+        hours = rng.lognormvariate(2.5, 0.8)
+        tracker.record(rng.choice(TEST_TYPES), rng.choice(PRIORITIES), completed - timedelta(hours=hours), completed)
+        exact.append((completed, hours))
+    elapsed = time.perf_counter() - start
+    print(f"results={results} ingest {elapsed / results * 1e6:.2f} us/result")
+
+    end = origin + timedelta(days=days)
+    for window_days in (1, 7, 30):
+        window_start = end - timedelta(days=window_days, hours=5)
+        start = time.perf_counter()
+        summary = tracker.summary(window_start, end)
+        query = time.perf_counter() - start
+        values = sorted(h for completed, h in exact if window_start <= completed < end)
+        true_p99 = values[int(0.99 * (len(values) - 1))]
+        error = abs(summary["overall"]["p99"] - true_p99) / true_p99
+        print(f"{window_days:2d}d window  {query * 1000:7.2f} ms  n={summary['overall']['count']:8d}  "
+              f"p99 rel. error {error * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
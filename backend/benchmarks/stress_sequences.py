@@ -0,0 +1,71 @@
+"""Allocate millions of ids across threads and processes and check for collisions.
+
+Run from the backend directory:
+
+    python benchmarks/stress_sequences.py [ids_per_worker] [processes] [threads]
+
+Every process shares one FileBlockSource; pass --database to share the
+id_sequences table of DATABASE_URL instead (apply the migrations first).
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sequences import DatabaseBlockSource, FileBlockSource, SequenceAllocator
+
+
+def make_source(path):
+    if path == "--database":
+        from database import engine
+        return DatabaseBlockSource(engine)
+    return FileBlockSource(path)
+
+
+def worker(path, per_thread, threads, out_path):
+    allocator = SequenceAllocator(make_source(path), "stress", block_size=1000)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        batches = list(pool.map(lambda _: array("q", (allocator.next_id() for _ in range(per_thread))),
+                                range(threads)))
+    with open(out_path, "wb") as out:
+        for batch in batches:
+            batch.tofile(out)
+
+
+def main(per_thread, processes, threads, source):
+    workdir = tempfile.mkdtemp()
+    path = source or os.path.join(workdir, "sequences.json")
+    outputs = [os.path.join(workdir, f"ids-{i}.bin") for i in range(processes)]
+    start = time.perf_counter()
+    procs = [multiprocessing.Process(target=worker, args=(path, per_thread, threads, out)) for out in outputs]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - start
+
+    ids = array("q")
+    for out in outputs:
+        with open(out, "rb") as handle:
+            ids.frombytes(handle.read())
+    expected = per_thread * threads * processes
+    unique = len(set(ids))
+    print(f"processes={processes} threads={threads} ids={len(ids)} unique={unique} "
+          f"collisions={len(ids) - unique} {expected / elapsed / 1e6:.2f} M ids/s")
+    if len(ids) != expected or unique != expected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--database"]
+    main(
+        int(args[0]) if len(args) > 0 else 250_000,
+        int(args[1]) if len(args) > 1 else 4,
+        int(args[2]) if len(args) > 2 else 4,
+        "--database" if "--database" in sys.argv else None,
+    )
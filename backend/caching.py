@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+
+class ResponseCache:
+    """Single-flight request coalescing followed by a short TTL cache.
+
+    Concurrent requests with the same route, normalized query parameters and
+    role share one computation, which runs in the threadpool so the event loop
+    keeps accepting requests meanwhile. The result is then served for `ttl`
+    seconds or until a mutation calls invalidate(). At most `max_entries`
+    results are kept; expired and oldest entries are evicted on insert.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Insertion order is expiry order, since every entry lives for the same ttl
+        self._entries: "OrderedDict[tuple, Tuple[float, Any]]" = OrderedDict()
+        # Keyed by (generation, key), so a request made after a mutation never joins a computation begun before it
+        self._inflight: Dict[Tuple[int, tuple], asyncio.Task] = {}
+        self._generation = 0
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "coalesced": 0, "computes": 0}
+        )
+
+    @staticmethod
+    def _key(route: str, params: Optional[dict], role: Optional[str]) -> tuple:
+        normalized = tuple(sorted((name, str(value)) for name, value in (params or {}).items() if value is not None))
+        return route, normalized, role
+
+    async def get_or_compute(self, route: str, params: Optional[dict], role: Optional[str],
+                             compute: Callable[[], Any]) -> Any:
+        key = self._key(route, params, role)
+        counters = self._counters[route]
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            counters["hits"] += 1
+            return entry[1]
+
+        flight = (self._generation, key)
+        task = self._inflight.get(flight)
+        if task is not None:
+            counters["coalesced"] += 1
+        else:
+            counters["computes"] += 1
+            # The cache owns the computation, not the request that started it
+            task = self._inflight[flight] = asyncio.ensure_future(self._compute(flight, compute))
+            task.add_done_callback(_retrieve_exception)
+        # Shielded so that any one client disconnecting does not cancel the shared work
+        return await asyncio.shield(task)
+
+    async def _compute(self, flight: Tuple[int, tuple], compute: Callable[[], Any]) -> Any:
+        generation, key = flight
+        try:
+            value = await run_in_threadpool(compute)
+        finally:
+            self._inflight.pop(flight, None)
+        # A mutation during the computation makes its result stale on arrival
+        if self.ttl > 0 and generation == self._generation:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: tuple, value: Any):
+        now = time.monotonic()
+        self._entries.pop(key, None)
+        self._entries[key] = (now + self.ttl, value)
+        while self._entries:
+            oldest_key, (expires, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[oldest_key]
+
+    def invalidate(self):
+        """Drop every cached result; called after any mutation"""
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {route: dict(counters) for route, counters in self._counters.items()}
+
+
+def _retrieve_exception(task: asyncio.Task):
+    # Mark a failure as seen when every waiting request has already gone away
+    if not task.cancelled():
+        task.exception()
+
+
+response_cache = ResponseCache(ttl=float(os.getenv("RESPONSE_CACHE_TTL", "5")))
@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Date, Text
+from sqlalchemy import create_engine, select, text, BigInteger, Column, ForeignKey, Index, Integer, String, DateTime, Boolean, Date, Text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -30,17 +30,41 @@ class User(Base):
 
 class Sample(Base):
     __tablename__ = "samples"
+    __table_args__ = (
+        Index("ix_samples_status_assigned_to", "status", "assigned_to"),
+        Index(
+            "ix_samples_open_worklist", "assigned_to", "priority",
+            postgresql_where=text("status IN ('pending', 'in_progress')"),
+            sqlite_where=text("status IN ('pending', 'in_progress')"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sample_id = Column(String, unique=True, index=True)
     patient_name = Column(String)
     sample_type = Column(String)
-    collection_date = Column(Date)
+    collection_date = Column(Date, index=True)
     priority = Column(String, default="normal")
     status = Column(String, default="pending")
     assigned_to = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    results = relationship("TestResult", back_populates="sample")
+
+class SampleAuditEvent(Base):
+    __tablename__ = "sample_audit_events"
+    __table_args__ = (
+        Index("ix_sample_audit_events_sample_id_changed_at", "sample_id", "changed_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    sample_id = Column(Integer)
+    field = Column(String)
+    old_value = Column(Text, nullable=True)
+    new_value = Column(Text, nullable=True)
+    changed_by = Column(Integer, nullable=True)
+    changed_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 class Test(Base):
     __tablename__ = "tests"
@@ -55,17 +79,27 @@ class TestResult(Base):
     __tablename__ = "test_results"
     
     id = Column(Integer, primary_key=True, index=True)
-    sample_id = Column(Integer)
-    test_id = Column(Integer)
+    sample_id = Column(Integer, ForeignKey("samples.id", name="fk_test_results_sample_id"), index=True)
+    test_id = Column(Integer, ForeignKey("tests.id", name="fk_test_results_test_id"), index=True)
     result_value = Column(String)
     result_unit = Column(String, nullable=True)
     reference_range = Column(String, nullable=True)
     performed_by = Column(Integer)
     performed_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String, default="completed")
+    
+    sample = relationship("Sample", back_populates="results")
+    test = relationship("Test")
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
+    __table_args__ = (
+        Index(
+            "ix_inventory_items_low_stock", "category",
+            postgresql_where=text("quantity <= min_threshold"),
+            sqlite_where=text("quantity <= min_threshold"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     item_name = Column(String)
@@ -77,6 +111,12 @@ class InventoryItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class IdSequence(Base):
+    __tablename__ = "id_sequences"
+    
+    name = Column(String, primary_key=True)
+    next_value = Column(BigInteger, nullable=False)
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -85,6 +125,24 @@ def get_db():
     finally:
         db.close()
 
+# Sparse fieldsets
+def select_fields(model, fields=None):
+    """Build a SELECT over only the requested columns of a model (all columns if none given)"""
+    if not fields:
+        return select(*model.__table__.columns)
+    columns = model.__table__.columns
+    unknown = [name for name in fields if name not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns for {model.__tablename__}: {', '.join(unknown)}")
+    return select(*(columns[name] for name in fields))
+
+def fetch_fields(db, model, *criteria, fields=None):
+    """Run a projected SELECT and return plain dict rows keyed by column name"""
+    query = select_fields(model, fields)
+    if criteria:
+        query = query.where(*criteria)
+    return [dict(row) for row in db.execute(query).mappings()]
+
 # Create tables
 def create_tables():
     Base.metadata.create_all(bind=engine) 
\ No newline at end of file
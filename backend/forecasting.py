@@ -0,0 +1,125 @@
+import math
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class ConsumptionForecaster:
+    """Rolling daily outward consumption of every inventory item in one matrix.
+
+    Row r holds the last `window_days` daily outward totals of one item as a
+    ring buffer indexed by day ordinal, so recording a transaction is a single
+    cell update and forecasting is a handful of vectorized operations over all
+    items, never a rescan of the transaction history.
+    """
+
+    def __init__(self, window_days: int = 28, short_window_days: int = 7,
+                 lead_time_days: float = 7, service_z: float = 1.65):
+        if short_window_days > window_days:
+            raise ValueError("short_window_days cannot exceed window_days")
+        self.window_days = window_days
+        self.short_window_days = short_window_days
+        self.lead_time_days = lead_time_days
+        self.service_z = service_z
+        self._lock = Lock()
+        self._usage = np.zeros((0, window_days))
+        self._first_day = np.zeros(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._today: Optional[int] = None
+
+    def _row(self, item_id: int, day: int) -> int:
+        row = self._rows.get(item_id)
+        if row is None:
+            row = self._rows[item_id] = len(self._rows)
+            if row == len(self._usage):
+                capacity = max(16, 2 * len(self._usage))
+                self._usage = np.vstack([self._usage, np.zeros((capacity - len(self._usage), self.window_days))])
+                self._first_day = np.concatenate([self._first_day, np.zeros(capacity - len(self._first_day), dtype=np.int64)])
+            self._first_day[row] = day
+        return row
+
+    def _advance(self, day: int):
+        """Move the window forward to `day`, clearing the columns of skipped days"""
+        if self._today is None:
+            self._today = day
+            return
+        if day <= self._today:
+            return
+        steps = min(day - self._today, self.window_days)
+        columns = [(self._today + k) % self.window_days for k in range(1, steps + 1)]
+        self._usage[:, columns] = 0
+        self._today = day
+
+    def observe(self, item_id: int, quantity_change: float, when: Optional[datetime] = None):
+        """Record one inventory transaction; only outward (negative) changes count as consumption"""
+        day = (when or datetime.now()).toordinal()
+        with self._lock:
+            self._advance(day)
+            row = self._row(item_id, day)
+            if quantity_change < 0 and day > self._today - self.window_days:
+                self._usage[row, day % self.window_days] -= quantity_change
+
+    def observe_many(self, transactions: Iterable[dict]):
+        """Replay stored transactions (oldest first), e.g. after a restart"""
+        for transaction in transactions:
+            self.observe(transaction["item_id"], transaction["quantity_change"], transaction["performed_at"])
+
+    def forecast(self, items: List[dict], today: Optional[date] = None) -> List[dict]:
+        """Consumption rate, days to stockout and reorder point for each item"""
+        day = (today or date.today()).toordinal()
+        with self._lock:
+            self._advance(day)
+            rows = np.array([self._row(item["id"], day) for item in items], dtype=np.int64)
+            usage = self._usage[rows]
+            first_day = self._first_day[rows]
+            current = self._today
+
+        # Age in days of each ring column, and how many days each item has been tracked
+        age = (current - np.arange(self.window_days)) % self.window_days
+        tracked = np.clip(current - first_day + 1, 1, self.window_days)
+        valid = age[None, :] < tracked[:, None]
+        short = valid & (age[None, :] < self.short_window_days)
+
+        used = np.where(valid, usage, 0.0)
+        long_rate = used.sum(axis=1) / tracked
+        short_rate = np.where(short, usage, 0.0).sum(axis=1) / np.minimum(tracked, self.short_window_days)
+        # The higher of the two rates, so a recent surge in use is not averaged away
+        rate = np.maximum(long_rate, short_rate)
+        variance = np.where(valid, (usage - long_rate[:, None]) ** 2, 0.0).sum(axis=1) / tracked
+        safety_stock = self.service_z * np.sqrt(variance) * math.sqrt(self.lead_time_days)
+        reorder_point = np.ceil(rate * self.lead_time_days + safety_stock)
+
+        quantity = np.array([item["quantity"] for item in items], dtype=float)
+        # Divide only where there is consumption (no 0/0 or x/0 warnings); items already
+        # out of stock, including negative counts, have zero days left
+        stock = np.maximum(quantity, 0.0)
+        days_left = np.full(len(items), np.inf)
+        np.divide(stock, rate, out=days_left, where=rate > 0)
+        days_left[stock <= 0] = 0.0
+
+        start = date.fromordinal(current)
+        # Slow movers with deep stock can run out past date.max; they get no projected date
+        horizon = date.max.toordinal() - current
+        forecasts = []
+        for i, item in enumerate(items):
+            finite = bool(np.isfinite(days_left[i]))
+            dated = finite and days_left[i] < horizon
+            forecasts.append({
+                "item_id": item["id"],
+                "item_code": item["item_code"],
+                "item_name": item["item_name"],
+                "quantity": item["quantity"],
+                "min_threshold": item["min_threshold"],
+                "daily_consumption": float(rate[i]),
+                "days_to_stockout": float(days_left[i]) if finite else None,
+                "projected_stockout_date": start + timedelta(days=int(days_left[i])) if dated else None,
+                "suggested_reorder_point": int(reorder_point[i]),
+                "reorder_now": bool(quantity[i] <= reorder_point[i] and rate[i] > 0),
+            })
+        return forecasts
+
+
+# Process-wide consumption state, fed by inventory transactions
+consumption_forecaster = ConsumptionForecaster()
@@ -0,0 +1,96 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+from starlette.concurrency import run_in_threadpool
+
+BatchFn = Callable[[List[Hashable]], Dict[Hashable, Any]]
+
+
+class BatchLoader:
+    """Dataloader-style batching of keyed lookups within one request.
+
+    Every load() made before the event loop next gets control is answered by a
+    single batch_fn call with the distinct keys, run in the threadpool. Values
+    are memoized for the life of the loader, so create one per request.
+    """
+
+    def __init__(self, batch_fn: BatchFn):
+        self.batch_fn = batch_fn
+        self.batches = 0
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._pending: List[Hashable] = []
+
+    def load(self, key: Hashable) -> asyncio.Future:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            if not self._pending:
+                # Two hops, so tasks scheduled alongside this one still join the batch
+                loop.call_soon(loop.call_soon, self._dispatch)
+            self._pending.append(key)
+        return future
+
+    def load_many(self, keys: Iterable[Hashable]) -> "asyncio.Future[List[Any]]":
+        """Queue all keys now (not when awaited) and resolve to their values in order"""
+        return asyncio.gather(*(self.load(key) for key in keys))
+
+    def _dispatch(self):
+        keys, self._pending = self._pending, []
+        asyncio.ensure_future(self._run(keys))
+
+    async def _run(self, keys: List[Hashable]):
+        self.batches += 1
+        try:
+            values = await run_in_threadpool(self.batch_fn, keys)
+        except Exception as exc:
+            for key in keys:
+                # Forget failed keys so a later load can retry them
+                self._futures.pop(key).set_exception(exc)
+            return
+        for key in keys:
+            self._futures[key].set_result(values.get(key))
+
+
+def group_by(rows: Iterable[dict], field: str, keys: Iterable[Hashable]) -> Dict[Hashable, List[dict]]:
+    """Group rows by one field, with an empty list for keys that have no rows"""
+    grouped: Dict[Hashable, List[dict]] = {key: [] for key in keys}
+    for row in rows:
+        if row[field] in grouped:
+            grouped[row[field]].append(row)
+    return grouped
+
+
+class SampleViewLoaders:
+    """Per-request loaders for the joined sample view: samples, their results, and tests.
+
+    Each entity type is fetched with one batch call however many samples and
+    results the page holds; the join happens in memory.
+    """
+
+    def __init__(self, fetch_samples: BatchFn, fetch_results: BatchFn, fetch_tests: BatchFn):
+        self.samples = BatchLoader(fetch_samples)
+        self.results = BatchLoader(fetch_results)
+        self.tests = BatchLoader(fetch_tests)
+
+    async def load_full(self, sample_ids: Iterable[int]) -> List[dict]:
+        """Samples (in the order asked, missing ids skipped) with `results`, each carrying its `test`"""
+        samples = [s for s in await self.samples.load_many(dict.fromkeys(sample_ids)) if s is not None]
+        results = await self.results.load_many(s["id"] for s in samples)
+        test_ids = list(dict.fromkeys(r["test_id"] for rows in results for r in rows or ()))
+        tests = dict(zip(test_ids, await self.tests.load_many(test_ids)))
+        return [
+            {**sample, "results": [{**r, "test": tests.get(r["test_id"])} for r in rows or ()]}
+            for sample, rows in zip(samples, results)
+        ]
+
+
+def database_loaders(db) -> SampleViewLoaders:
+    """Loaders issuing one SELECT ... WHERE ... IN (...) per entity type"""
+    from database import Sample, Test, TestResult, fetch_fields
+
+    return SampleViewLoaders(
+        lambda ids: {row["id"]: row for row in fetch_fields(db, Sample, Sample.id.in_(ids))},
+        lambda ids: group_by(fetch_fields(db, TestResult, TestResult.sample_id.in_(ids)), "sample_id", ids),
+        lambda ids: {row["id"]: row for row in fetch_fields(db, Test, Test.id.in_(ids))},
+    )
@@ -1,12 +1,28 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Optional
+from collections import defaultdict
 from datetime import datetime, date
+import gzip
 import os
 from dotenv import load_dotenv
 
+from analytics import turnaround_tracker
+from audit import diff_fields, sample_audit
+from caching import response_cache
+from forecasting import consumption_forecaster
+from loaders import SampleViewLoaders
+from models import (
+    SAMPLE_STATUS_TRANSITIONS, InventoryForecast, ReportJob, ReportJobCreate, SampleAuditEvent, SampleBatchUpdate,
+    TurnaroundReport
+)
+from sequences import AccessionNumberGenerator, SequenceAllocator, block_source_from_env
+from projection import parse_fields, projected_response
+from reports import ReportJobManager, sample_columns
+from sample_store import make_sample_store
+
 # Load environment variables
 load_dotenv()
 
@@ -52,7 +68,7 @@ class SampleBase(BaseModel):
     priority: str = "normal"
 
 class SampleCreate(SampleBase):
-    pass
+    sample_id: Optional[str] = None  # assigned an accession number when omitted
 
 class Sample(SampleBase):
     id: int
@@ -89,6 +105,13 @@ class TestResult(TestResultBase):
     performed_at: datetime
     status: str = "completed"
 
+# Joined sample view, built on the models above so every stored row can be served
+class SampleResultDetail(TestResult):
+    test: Optional[Test] = None
+
+class SampleFull(Sample):
+    results: List[SampleResultDetail] = []
+
 class InventoryItemBase(BaseModel):
     item_name: str
     item_code: str
@@ -125,7 +148,7 @@ mock_users = [
     }
 ]
 
-mock_samples = [
+mock_samples = make_sample_store([
     {
         "id": 1,
         "sample_id": "SAMP001",
@@ -138,7 +161,7 @@ mock_samples = [
         "created_at": datetime.now(),
         "updated_at": datetime.now()
     }
-]
+])
 
 mock_tests = [
     {
@@ -150,6 +173,11 @@ mock_tests = [
     }
 ]
 
+mock_test_results = []
+
+# Results of each sample, kept alongside mock_test_results like an index on sample_id
+mock_results_by_sample = defaultdict(list)
+
 mock_inventory = [
     {
         "id": 1,
@@ -164,6 +192,46 @@ mock_inventory = [
     }
 ]
 
+mock_inventory_transactions = []
+
+# Id and accession number allocation (blocks are shared across workers via SEQUENCE_STORE)
+sequence_source = block_source_from_env()
+
+def _id_allocator(name: str, rows: list) -> SequenceAllocator:
+    return SequenceAllocator(sequence_source, name, start=max((r["id"] for r in rows), default=0) + 1)
+
+user_ids = _id_allocator("users", mock_users)
+sample_ids = _id_allocator("samples", mock_samples)
+test_ids = _id_allocator("tests", mock_tests)
+test_result_ids = _id_allocator("test_results", mock_test_results)
+inventory_ids = _id_allocator("inventory_items", mock_inventory)
+inventory_transaction_ids = _id_allocator("inventory_transactions", mock_inventory_transactions)
+
+accession_numbers = AccessionNumberGenerator(
+    sequence_source,
+    prefix=os.getenv("ACCESSION_PREFIX", "SAMP"),
+    width=int(os.getenv("ACCESSION_WIDTH", "3")),
+    daily_reset=os.getenv("ACCESSION_DAILY_RESET", "false").lower() == "true"
+)
+# Continue after the highest accession number already issued, not the sample count
+accession_numbers.seed(s["sample_id"] for s in mock_samples)
+
+# Bumped on every mutation; keys cached reports and artifacts to the data they were built from
+data_version = 0
+
+def _mark_data_changed():
+    global data_version
+    data_version += 1
+    response_cache.invalidate()
+
+report_jobs = ReportJobManager(
+    max_workers=int(os.getenv("REPORT_WORKERS")) if os.getenv("REPORT_WORKERS") else None
+)
+
+@app.on_event("shutdown")
+def shutdown_report_jobs():
+    report_jobs.shutdown()
+
 # Authentication dependency
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     # Mock authentication - in real implementation, verify JWT token
@@ -178,8 +246,14 @@ async def root():
 
 # User Management Endpoints
 @app.get("/users", response_model=List[User])
-async def get_users(current_user: dict = Depends(get_current_user)):
+async def get_users(
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     """Get all users"""
+    selected = parse_fields(fields, User)
+    if selected:
+        return projected_response(mock_users, User, selected)
     return mock_users
 
 @app.post("/users", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -189,7 +263,7 @@ async def create_user(user: UserCreate, current_user: dict = Depends(get_current
         raise HTTPException(status_code=403, detail="Only admins can create users")
     
     new_user = {
-        "id": len(mock_users) + 1,
+        "id": user_ids.next_id(),
         "email": user.email,
         "full_name": user.full_name,
         "role": user.role,
@@ -197,6 +271,7 @@ async def create_user(user: UserCreate, current_user: dict = Depends(get_current
         "is_active": True
     }
     mock_users.append(new_user)
+    _mark_data_changed()
     return new_user
 
 # Sample Management Endpoints
@@ -204,30 +279,71 @@ async def create_user(user: UserCreate, current_user: dict = Depends(get_current
 async def get_samples(
     status: Optional[str] = None,
     assigned_to: Optional[int] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
     """Get all samples with optional filtering"""
-    samples = mock_samples
-    if status:
-        samples = [s for s in samples if s["status"] == status]
-    if assigned_to:
-        samples = [s for s in samples if s["assigned_to"] == assigned_to]
+    selected = parse_fields(fields, Sample)
+    samples = mock_samples.filter(status=status or None, assigned_to=assigned_to or None, fields=selected)
+    if selected:
+        return projected_response(samples, Sample, selected)
     return samples
 
+def _check_client_sample_id(value) -> None:
+    """Client-chosen sample ids may not use the generated accession format, or they could collide"""
+    if isinstance(value, str) and accession_numbers.reserves(value):
+        raise HTTPException(
+            status_code=400,
+            detail=f"sample_id {value} is in the generated accession number format; omit it to have one assigned"
+        )
+
 @app.post("/samples", response_model=Sample, status_code=status.HTTP_201_CREATED)
 async def create_sample(sample: SampleCreate, current_user: dict = Depends(get_current_user)):
     """Create a new sample"""
+    if sample.sample_id:
+        _check_client_sample_id(sample.sample_id)
     new_sample = {
-        "id": len(mock_samples) + 1,
+        "id": sample_ids.next_id(),
         **sample.dict(),
+        "sample_id": sample.sample_id or accession_numbers.next_number(),
         "status": "pending",
         "assigned_to": None,
         "created_at": datetime.now(),
         "updated_at": datetime.now()
     }
     mock_samples.append(new_sample)
+    _mark_data_changed()
     return new_sample
 
+# Joined sample view: one batch lookup per entity type, joined in memory
+MAX_FULL_SAMPLES = 500
+
+def _load_results(sample_ids: List[int]) -> dict:
+    return {sample_id: list(mock_results_by_sample.get(sample_id, ())) for sample_id in sample_ids}
+
+def _load_tests(test_ids: List[int]) -> dict:
+    wanted = set(test_ids)
+    return {t["id"]: t for t in mock_tests if t["id"] in wanted}
+
+async def get_sample_view_loaders() -> SampleViewLoaders:
+    """Fresh loaders for every request, so nothing is memoized across requests"""
+    return SampleViewLoaders(mock_samples.find_many, _load_results, _load_tests)
+
+@app.get("/samples/full", response_model=List[SampleFull])
+async def get_samples_full(
+    ids: str,
+    loaders: SampleViewLoaders = Depends(get_sample_view_loaders),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get samples by comma separated ids, each with its test results and their test definitions"""
+    try:
+        sample_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma separated integers")
+    if len(sample_ids) > MAX_FULL_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_FULL_SAMPLES} ids per request")
+    return await loaders.load_full(sample_ids)
+
 @app.put("/samples/{sample_id}", response_model=Sample)
 async def update_sample(
     sample_id: int,
@@ -235,17 +351,128 @@ async def update_sample(
     current_user: dict = Depends(get_current_user)
 ):
     """Update sample status or assignment"""
-    for sample in mock_samples:
-        if sample["id"] == sample_id:
-            sample.update(sample_update)
-            sample["updated_at"] = datetime.now()
-            return sample
-    raise HTTPException(status_code=404, detail="Sample not found")
+    sample = mock_samples.find(sample_id)
+    if sample is None:
+        raise HTTPException(status_code=404, detail="Sample not found")
+    if sample_update.get("sample_id", sample["sample_id"]) != sample["sample_id"]:
+        _check_client_sample_id(sample_update["sample_id"])
+    changes = diff_fields(sample, sample_update)
+    sample.update(sample_update)
+    sample["updated_at"] = datetime.now()
+    sample_audit.record(sample_id, changes, current_user.get("user_id"), sample["updated_at"])
+    _mark_data_changed()
+    return sample
+
+@app.get("/samples/{sample_id}/history", response_model=List[SampleAuditEvent])
+async def get_sample_history(
+    sample_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the field-level change history of a sample, oldest first"""
+    if mock_samples.find(sample_id) is None:
+        raise HTTPException(status_code=404, detail="Sample not found")
+    return sample_audit.history(sample_id, start, end, limit)
+
+@app.get("/samples/{sample_id}/full", response_model=SampleFull)
+async def get_sample_full(
+    sample_id: int,
+    loaders: SampleViewLoaders = Depends(get_sample_view_loaders),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a sample with its test results and their test definitions"""
+    samples = await loaders.load_full([sample_id])
+    if not samples:
+        raise HTTPException(status_code=404, detail="Sample not found")
+    return samples[0]
+
+def _select_batch_targets(batch: SampleBatchUpdate):
+    """Resolve a batch request into (sample id, SampleUpdate) pairs"""
+    if batch.items is not None:
+        if batch.filter is not None or batch.update is not None:
+            raise HTTPException(status_code=400, detail="Use either items or filter with update, not both")
+        return [(item.id, item.update) for item in batch.items]
+    if batch.filter is None or batch.update is None:
+        raise HTTPException(status_code=400, detail="Batch requires items or a filter with an update")
+
+    criteria = batch.filter
+    # An empty or forgotten filter must not turn into a store-wide update
+    if criteria.ids is None and not criteria.status and criteria.assigned_to is None and not criteria.sample_type:
+        raise HTTPException(status_code=400, detail="Batch filter needs at least one of ids, status, assigned_to or sample_type")
+    samples = mock_samples.filter(
+        ids=criteria.ids,
+        status=criteria.status or None,
+        assigned_to=criteria.assigned_to,
+        sample_type=criteria.sample_type or None,
+        fields=("id",)
+    )
+    return [(s["id"], batch.update) for s in samples]
+
+@app.patch("/samples/batch", response_model=List[Sample])
+async def update_samples_batch(
+    batch: SampleBatchUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Update many samples at once; either every change is applied or none is"""
+    targets = _select_batch_targets(batch)
+    samples_by_id = mock_samples.find_many(sample_id for sample_id, _ in targets)
+
+    errors = []
+    planned = []
+    seen = set()
+    for sample_id, update in targets:
+        sample = samples_by_id.get(sample_id)
+        if sample is None:
+            errors.append({"id": sample_id, "error": "Sample not found"})
+            continue
+        if sample_id in seen:
+            errors.append({"id": sample_id, "error": "Sample listed more than once"})
+            continue
+        seen.add(sample_id)
+        values = update.model_dump(mode="json", exclude_unset=True)
+        new_status = values.get("status")
+        if new_status and new_status != sample["status"] \
+                and new_status not in SAMPLE_STATUS_TRANSITIONS.get(sample["status"], set()):
+            errors.append({"id": sample_id, "error": f"Cannot change status from {sample['status']} to {new_status}"})
+            continue
+        planned.append((sample, values))
+    if errors:
+        raise HTTPException(status_code=409, detail=errors)
+
+    now = datetime.now()
+    audited = []
+    for sample, values in planned:
+        audited.append((sample["id"], diff_fields(sample, values)))
+        sample.update(values)
+        sample["updated_at"] = now
+    sample_audit.record_many(audited, current_user.get("user_id"), now)
+    _mark_data_changed()
+    return [sample for sample, _ in planned]
+
+@app.get("/audit/samples", response_model=List[SampleAuditEvent])
+async def get_sample_audit(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 1000,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get sample changes across all samples within a time window, oldest first"""
+    if current_user["role"] not in ["admin", "supervisor"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return sample_audit.window(start, end, limit)
 
 # Test Management Endpoints
 @app.get("/tests", response_model=List[Test])
-async def get_tests(current_user: dict = Depends(get_current_user)):
+async def get_tests(
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     """Get all available tests"""
+    selected = parse_fields(fields, Test)
+    if selected:
+        return projected_response(mock_tests, Test, selected)
     return mock_tests
 
 @app.post("/tests", response_model=Test, status_code=status.HTTP_201_CREATED)
@@ -255,26 +482,71 @@ async def create_test(test: TestCreate, current_user: dict = Depends(get_current
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
     new_test = {
-        "id": len(mock_tests) + 1,
+        "id": test_ids.next_id(),
         **test.dict(),
         "created_at": datetime.now()
     }
     mock_tests.append(new_test)
+    _mark_data_changed()
     return new_test
 
+# Test Result Endpoints
+@app.get("/results", response_model=List[TestResult])
+async def get_results(
+    sample_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get test results, optionally for one sample"""
+    results = mock_test_results
+    if sample_id:
+        results = [r for r in results if r["sample_id"] == sample_id]
+    return results
+
+@app.post("/results", response_model=TestResult, status_code=status.HTTP_201_CREATED)
+async def create_result(result: TestResultCreate, current_user: dict = Depends(get_current_user)):
+    """Record a completed test result"""
+    sample = mock_samples.find(result.sample_id)
+    if sample is None:
+        raise HTTPException(status_code=404, detail="Sample not found")
+    test = next((t for t in mock_tests if t["id"] == result.test_id), None)
+    if test is None:
+        raise HTTPException(status_code=404, detail="Test not found")
+
+    new_result = {
+        "id": test_result_ids.next_id(),
+        **result.dict(),
+        "performed_by": current_user["user_id"],
+        "performed_at": datetime.now(),
+        "status": "completed"
+    }
+    mock_test_results.append(new_result)
+    mock_results_by_sample[new_result["sample_id"]].append(new_result)
+    _mark_data_changed()
+    turnaround_tracker.record(
+        test["test_type"],
+        sample["priority"],
+        datetime.combine(sample["collection_date"], datetime.min.time()),
+        new_result["performed_at"]
+    )
+    return new_result
+
 # Inventory Management Endpoints
 @app.get("/inventory", response_model=List[InventoryItem])
 async def get_inventory(
     category: Optional[str] = None,
     low_stock: bool = False,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
     """Get inventory items with optional filtering"""
+    selected = parse_fields(fields, InventoryItem)
     items = mock_inventory
     if category:
         items = [item for item in items if item["category"] == category]
     if low_stock:
         items = [item for item in items if item["quantity"] <= item["min_threshold"]]
+    if selected:
+        return projected_response(items, InventoryItem, selected)
     return items
 
 @app.post("/inventory", response_model=InventoryItem, status_code=status.HTTP_201_CREATED)
@@ -284,12 +556,13 @@ async def create_inventory_item(
 ):
     """Add new inventory item"""
     new_item = {
-        "id": len(mock_inventory) + 1,
+        "id": inventory_ids.next_id(),
         **item.dict(),
         "created_at": datetime.now(),
         "updated_at": datetime.now()
     }
     mock_inventory.append(new_item)
+    _mark_data_changed()
     return new_item
 
 @app.put("/inventory/{item_id}", response_model=InventoryItem)
@@ -303,16 +576,48 @@ async def update_inventory_item(
         if item["id"] == item_id:
             item["quantity"] += quantity_change
             item["updated_at"] = datetime.now()
+            mock_inventory_transactions.append({
+                "id": inventory_transaction_ids.next_id(),
+                "item_id": item_id,
+                "quantity_change": quantity_change,
+                "transaction_type": "inward" if quantity_change >= 0 else "outward",
+                "reason": None,
+                "performed_by": current_user["user_id"],
+                "performed_at": item["updated_at"]
+            })
+            consumption_forecaster.observe(item_id, quantity_change, item["updated_at"])
+            _mark_data_changed()
             return item
     raise HTTPException(status_code=404, detail="Inventory item not found")
 
+@app.get("/inventory/forecast", response_model=List[InventoryForecast])
+async def get_inventory_forecast(
+    category: Optional[str] = None,
+    reorder_only: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Forecast consumption, days to stockout and reorder points from recent outward transactions"""
+    items = mock_inventory
+    if category:
+        items = [item for item in items if item["category"] == category]
+    forecasts = consumption_forecaster.forecast(items)
+    if reorder_only:
+        forecasts = [f for f in forecasts if f["reorder_now"]]
+    return forecasts
+
 # Dashboard Statistics
 @app.get("/dashboard/stats")
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     """Get dashboard statistics"""
+    return await response_cache.get_or_compute(
+        "/dashboard/stats", None, current_user["role"], _compute_dashboard_stats
+    )
+
+def _compute_dashboard_stats():
+    samples_by_status = mock_samples.count_by("status")
     total_samples = len(mock_samples)
-    pending_samples = len([s for s in mock_samples if s["status"] == "pending"])
-    completed_samples = len([s for s in mock_samples if s["status"] == "completed"])
+    pending_samples = samples_by_status.get("pending", 0)
+    completed_samples = samples_by_status.get("completed", 0)
     low_stock_items = len([i for i in mock_inventory if i["quantity"] <= i["min_threshold"]])
     
     return {
@@ -332,16 +637,81 @@ async def get_sample_report(
     current_user: dict = Depends(get_current_user)
 ):
     """Generate sample report"""
+    return await response_cache.get_or_compute(
+        "/reports/samples",
+        {"start_date": start_date, "end_date": end_date},
+        current_user["role"],
+        lambda: _compute_sample_report(start_date, end_date)
+    )
+
+def _compute_sample_report(start_date: Optional[date], end_date: Optional[date]):
+    samples_by_status = mock_samples.count_by("status")
     return {
         "period": f"{start_date} to {end_date}" if start_date and end_date else "All time",
         "total_samples": len(mock_samples),
         "samples_by_status": {
-            "pending": len([s for s in mock_samples if s["status"] == "pending"]),
-            "in_progress": len([s for s in mock_samples if s["status"] == "in_progress"]),
-            "completed": len([s for s in mock_samples if s["status"] == "completed"])
+            "pending": samples_by_status.get("pending", 0),
+            "in_progress": samples_by_status.get("in_progress", 0),
+            "completed": samples_by_status.get("completed", 0)
         }
     }
 
+@app.get("/reports/turnaround", response_model=TurnaroundReport)
+async def get_turnaround_report(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    test_type: Optional[str] = None,
+    priority: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Turnaround time percentiles in hours, from collection to completed result"""
+    return {
+        "period": f"{start or 'beginning'} to {end or 'now'}" if start or end else "All time",
+        **turnaround_tracker.summary(start, end, test_type, priority)
+    }
+
+@app.post("/reports/jobs", response_model=ReportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_report_job(job: ReportJobCreate, current_user: dict = Depends(get_current_user)):
+    """Start building a report in the background; poll /reports/jobs/{job_id} for its status"""
+    params = {
+        "start_date": job.start_date.isoformat() if job.start_date else None,
+        "end_date": job.end_date.isoformat() if job.end_date else None,
+    }
+    # Mutations run on the event loop, so reading data_version and snapshotting here, with no
+    # await in between, pairs the version with exactly the data it names; with the compact
+    # store the snapshot is a copy of a few numpy columns
+    return report_jobs.submit(job.kind.value, params, data_version, lambda: sample_columns(mock_samples))
+
+@app.get("/reports/jobs/{job_id}", response_model=ReportJob)
+async def get_report_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get the status of a report job"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+@app.get("/reports/jobs/{job_id}/result")
+async def get_report_job_result(job_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """Get the result of a completed report job, sent gzip-encoded when the client accepts it"""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Report job is {job['status']}")
+    artifact = report_jobs.artifact(job_id)
+    if artifact is None:
+        raise HTTPException(status_code=410, detail="Report artifact expired, submit the job again")
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(content=artifact, media_type="application/json", headers={"Content-Encoding": "gzip"})
+    return Response(content=gzip.decompress(artifact), media_type="application/json")
+
+@app.get("/cache/stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit, coalesce and compute counters of the response cache per route"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return response_cache.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime, date
 from enum import Enum
 
@@ -10,6 +10,14 @@ class SampleStatus(str, Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Allowed sample status transitions (a status may always be re-applied to itself)
+SAMPLE_STATUS_TRANSITIONS = {
+    SampleStatus.PENDING: {SampleStatus.IN_PROGRESS, SampleStatus.CANCELLED},
+    SampleStatus.IN_PROGRESS: {SampleStatus.COMPLETED, SampleStatus.CANCELLED, SampleStatus.PENDING},
+    SampleStatus.COMPLETED: set(),
+    SampleStatus.CANCELLED: set(),
+}
+
 class SamplePriority(str, Enum):
     LOW = "low"
     NORMAL = "normal"
@@ -70,9 +78,32 @@ class SampleCreate(SampleBase):
 
 class SampleUpdate(BaseModel):
     status: Optional[SampleStatus] = None
-    assigned_to: Optional[int] = None
+    assigned_to: Optional[int] = None  # null unassigns
     priority: Optional[SamplePriority] = None
 
+    @field_validator("status", "priority")
+    @classmethod
+    def not_null(cls, value):
+        # Only checked when given explicitly; an omitted field is left unchanged
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+class SampleBatchItem(BaseModel):
+    id: int = Field(..., description="Sample ID")
+    update: SampleUpdate
+
+class SampleBatchFilter(BaseModel):
+    ids: Optional[List[int]] = None
+    status: Optional[SampleStatus] = None
+    assigned_to: Optional[int] = None
+    sample_type: Optional[str] = None
+
+class SampleBatchUpdate(BaseModel):
+    items: Optional[List[SampleBatchItem]] = Field(None, description="Explicit (id, update) pairs")
+    filter: Optional[SampleBatchFilter] = Field(None, description="Select samples to update")
+    update: Optional[SampleUpdate] = Field(None, description="Update applied to every filtered sample")
+
 class Sample(SampleBase):
     id: int
     status: SampleStatus = SampleStatus.PENDING
@@ -83,6 +114,14 @@ class Sample(SampleBase):
     class Config:
         from_attributes = True
 
+class SampleAuditEvent(BaseModel):
+    sample_id: int
+    field: str
+    old_value: Optional[Any] = None
+    new_value: Optional[Any] = None
+    changed_by: Optional[int] = None
+    changed_at: datetime
+
 class TestBase(BaseModel):
     test_name: str = Field(..., description="Name of the test")
     test_type: TestType = Field(..., description="Type of test")
@@ -171,6 +210,18 @@ class InventoryTransaction(InventoryTransactionBase):
     class Config:
         from_attributes = True
 
+class InventoryForecast(BaseModel):
+    item_id: int
+    item_code: str
+    item_name: str
+    quantity: int
+    min_threshold: int
+    daily_consumption: float = Field(..., description="Outward quantity per day over the rolling windows")
+    days_to_stockout: Optional[float] = Field(None, description="None when nothing is being consumed")
+    projected_stockout_date: Optional[date] = None
+    suggested_reorder_point: int
+    reorder_now: bool
+
 # Dashboard Models
 class DashboardStats(BaseModel):
     total_samples: int
@@ -187,6 +238,40 @@ class SampleReport(BaseModel):
     samples_by_type: dict
     average_processing_time: Optional[float] = None
 
+class TurnaroundStats(BaseModel):
+    count: int
+    mean_hours: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+class TurnaroundReport(BaseModel):
+    period: str
+    overall: TurnaroundStats
+    by_test_type: Dict[str, TurnaroundStats]
+    by_priority: Dict[str, TurnaroundStats]
+
+class ReportKind(str, Enum):
+    SAMPLES = "samples"
+    BY_TYPE = "by_type"
+    BY_TECHNICIAN = "by_technician"
+
+class ReportJobCreate(BaseModel):
+    kind: ReportKind = Field(default=ReportKind.SAMPLES, description="Report to build")
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class ReportJob(BaseModel):
+    id: str
+    kind: ReportKind
+    params: dict
+    data_version: int
+    status: str
+    cached: bool = False
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
 # Authentication Models
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter, create_model
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma separated ?fields= value against the fields of a response model"""
+    if not fields:
+        return None
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
+
+
+@lru_cache(maxsize=256)
+def partial_adapter(model: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    """Build (once per field set) a list adapter for a model restricted to the given fields"""
+    definitions = {
+        name: (model.model_fields[name].annotation, model.model_fields[name])
+        for name in fields
+    }
+    partial = create_model(f"{model.__name__}Fields", **definitions)
+    return TypeAdapter(List[partial])
+
+
+def project_rows(rows: Iterable[dict], fields: Tuple[str, ...]) -> List[dict]:
+    """Keep only the requested keys of in-memory rows"""
+    return [{name: row.get(name) for name in fields} for row in rows]
+
+
+def projected_response(rows: Iterable[dict], model: Type[BaseModel], fields: Tuple[str, ...]) -> Response:
+    """Validate and serialize only the requested fields, bypassing the full response model"""
+    adapter = partial_adapter(model, fields)
+    payload = adapter.validate_python(project_rows(rows, fields))
+    return Response(content=adapter.dump_json(payload), media_type="application/json")
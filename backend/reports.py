@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import json
+import multiprocessing
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from datetime import date, datetime
+from threading import Lock
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from sample_store import NULL_DATE, NULL_INT, CodedColumns
+
+REPORT_FIELDS = ("status", "sample_type", "priority", "assigned_to", "collection_date")
+
+
+def sample_columns(samples) -> CodedColumns:
+    """Reduce a sample store to the coded columns reports need; a few arrays pickle far
+    cheaper to a worker than a Python tuple per sample"""
+    return samples.coded_columns(REPORT_FIELDS)
+
+
+def _labelled(counts, labels: list) -> Dict[str, int]:
+    return {labels[code]: count for code, count in enumerate(counts) if count}
+
+
+def build_report(kind: str, params: dict, columns: CodedColumns) -> dict:
+    """Aggregate coded sample columns; runs inside a worker process"""
+    codes, labels = columns
+    start_date = date.fromisoformat(params["start_date"]) if params.get("start_date") else None
+    end_date = date.fromisoformat(params["end_date"]) if params.get("end_date") else None
+    dates = codes["collection_date"]
+    mask = np.ones(len(dates), dtype=bool)
+    if start_date or end_date:
+        mask &= dates != NULL_DATE
+        if start_date is not None:
+            mask &= dates >= start_date.toordinal()
+        if end_date is not None:
+            mask &= dates <= end_date.toordinal()
+    statuses = codes["status"][mask]
+    status_labels = labels["status"]
+
+    report = {
+        "period": f"{start_date} to {end_date}" if start_date and end_date else "All time",
+        "total_samples": int(mask.sum()),
+        "samples_by_status": _labelled(np.bincount(statuses, minlength=len(status_labels)).tolist(), status_labels),
+    }
+    if kind == "samples":
+        for name, key in (("sample_type", "samples_by_type"), ("priority", "samples_by_priority")):
+            counts = np.bincount(codes[name][mask], minlength=len(labels[name])).tolist()
+            report[key] = _labelled(counts, labels[name])
+    elif kind in ("by_type", "by_technician"):
+        column = codes["sample_type" if kind == "by_type" else "assigned_to"][mask]
+        keys, groups = np.unique(column, return_inverse=True)
+        counts = np.zeros((len(keys), len(status_labels)), dtype=np.int64)
+        np.add.at(counts, (groups, statuses), 1)
+        if kind == "by_type":
+            names = [labels["sample_type"][key] for key in keys.tolist()]
+        else:
+            names = ["None" if key == NULL_INT else str(key) for key in keys.tolist()]
+        breakdown = {name: _labelled(row, status_labels) for name, row in zip(names, counts.tolist())}
+        report[kind] = dict(sorted(breakdown.items()))
+    else:
+        raise ValueError(f"Unknown report kind: {kind}")
+    return report
+
+
+class ReportJobManager:
+    """Runs report jobs in a process pool and keeps their results as gzip artifacts.
+
+    Artifacts are keyed by report kind, parameters and data version, so an
+    identical request against unchanged data is answered from the cache, and a
+    request identical to a running job joins that job. Workers are spawned,
+    not forked, since forking the multi-threaded server process can deadlock.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_artifacts: int = 128, max_jobs: int = 1024):
+        self.max_workers = max_workers
+        self.max_artifacts = max_artifacts
+        self.max_jobs = max_jobs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._running: Dict[str, str] = {}
+        self._artifacts: "OrderedDict[str, bytes]" = OrderedDict()
+
+    @staticmethod
+    def artifact_key(kind: str, params: dict, data_version: int) -> str:
+        payload = json.dumps({"kind": kind, "params": params, "version": data_version}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _prune_jobs(self):
+        """Forget the oldest finished jobs beyond max_jobs; running jobs are kept"""
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("completed", "failed")]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+
+    def submit(self, kind: str, params: dict, data_version: int,
+               snapshot: Callable[[], CodedColumns]) -> dict:
+        """Start a report job, or reuse a cached artifact or an identical running job"""
+        key = self.artifact_key(kind, params, data_version)
+        with self._lock:
+            if key in self._running:
+                return self._jobs[self._running[key]]
+            job = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "params": params,
+                "data_version": data_version,
+                "artifact_key": key,
+                "status": "pending",
+                "cached": False,
+                "error": None,
+                "created_at": datetime.now(),
+                "finished_at": None,
+            }
+            self._jobs[job["id"]] = job
+            self._prune_jobs()
+            if key in self._artifacts:
+                self._artifacts.move_to_end(key)
+                job.update(status="completed", cached=True, finished_at=job["created_at"])
+                return job
+            self._running[key] = job["id"]
+
+        try:
+            future = self._pool().submit(build_report, kind, params, snapshot())
+        except Exception as exc:
+            self._finish(job, None, exc)
+            return job
+        job["status"] = "running"
+        future.add_done_callback(lambda done: self._finish(job, done, None))
+        return job
+
+    def _finish(self, job: dict, future, error: Optional[BaseException]):
+        artifact = None
+        if error is None:
+            error = CancelledError() if future.cancelled() else future.exception()
+        if error is None:
+            artifact = gzip.compress(json.dumps(future.result(), default=str).encode())
+        with self._lock:
+            self._running.pop(job["artifact_key"], None)
+            if artifact is not None:
+                self._artifacts[job["artifact_key"]] = artifact
+                while len(self._artifacts) > self.max_artifacts:
+                    self._artifacts.popitem(last=False)
+                job["status"] = "completed"
+            else:
+                job["status"] = "failed"
+                job["error"] = str(error) or type(error).__name__
+            job["finished_at"] = datetime.now()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    def artifact(self, job_id: str) -> Optional[bytes]:
+        """Gzip-compressed JSON result of a completed job"""
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != "completed":
+            return None
+        return self._artifacts.get(job["artifact_key"])
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
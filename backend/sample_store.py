@@ -0,0 +1,414 @@
+import os
+from collections import Counter
+from collections.abc import MutableMapping
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import SamplePriority, SampleStatus
+from timestamps import from_micros, to_micros
+
+SAMPLE_FIELDS = (
+    "id", "sample_id", "patient_name", "sample_type", "collection_date",
+    "priority", "status", "assigned_to", "created_at", "updated_at",
+)
+
+
+class SampleList(list):
+    """Default sample store: one plain dict per sample"""
+
+    def find(self, sample_id: int) -> Optional[dict]:
+        return next((s for s in self if s["id"] == sample_id), None)
+
+    def find_many(self, sample_ids: Iterable[int]) -> Dict[int, dict]:
+        by_id = {s["id"]: s for s in self}
+        return {i: by_id[i] for i in sample_ids if i in by_id}
+
+    def filter(self, status=None, assigned_to=None, sample_type=None, ids=None, fields=None) -> List[dict]:
+        """Matching samples; `fields` is a hint only, the stored dicts are returned whole"""
+        samples = self
+        if ids is not None:
+            ids = set(ids)
+            samples = [s for s in samples if s["id"] in ids]
+        if status is not None:
+            samples = [s for s in samples if s["status"] == status]
+        if assigned_to is not None:
+            samples = [s for s in samples if s["assigned_to"] == assigned_to]
+        if sample_type is not None:
+            samples = [s for s in samples if s["sample_type"] == sample_type]
+        return list(samples)
+
+    def count_by(self, field: str) -> Dict[str, int]:
+        return dict(Counter(s[field] for s in self))
+
+    def columns(self, fields: Sequence[str]) -> List[tuple]:
+        return [tuple(s[f] for f in fields) for s in self]
+
+    def coded_columns(self, fields: Sequence[str]) -> "CodedColumns":
+        codes, labels = {}, {}
+        for name in fields:
+            category = Categorical() if COLUMN_KINDS[name] == CATEGORY else None
+            codes[name] = encode_column(COLUMN_KINDS[name], [s[name] for s in self], category)
+            if category is not None:
+                labels[name] = category.values
+        return codes, labels
+
+
+# Column kinds of the compact store
+INT, STR, CATEGORY, DATE, DATETIME = "int", "str", "category", "date", "datetime"
+
+COLUMN_KINDS = {
+    "id": INT,
+    "sample_id": STR,
+    "patient_name": STR,
+    "sample_type": CATEGORY,
+    "collection_date": DATE,
+    "priority": CATEGORY,
+    "status": CATEGORY,
+    "assigned_to": INT,
+    "created_at": DATETIME,
+    "updated_at": DATETIME,
+}
+
+NULL_INT = np.iinfo(np.int64).min
+NULL_DATE = -1
+
+# Numeric columns as arrays in the compact store's encoding, plus the labels of
+# each categorical column's codes: a snapshot that pickles as a few buffers
+CodedColumns = Tuple[Dict[str, np.ndarray], Dict[str, list]]
+
+
+class Categorical:
+    """Interned values of a low-cardinality column, stored as int16 codes"""
+
+    def __init__(self, values: Iterable = ()):
+        self.values: list = []
+        self.codes: dict = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) > np.iinfo(np.int16).max:
+                raise ValueError("Too many distinct values for a categorical column")
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def encode_column(kind: str, values: list, category: Optional[Categorical] = None) -> np.ndarray:
+    """Encode the values of a numeric or categorical column as the compact store holds them"""
+    if kind == INT:
+        return np.array([NULL_INT if v is None else v for v in values], dtype=np.int64)
+    if kind == CATEGORY:
+        return np.array([category.code(v.value if hasattr(v, "value") else v) for v in values], dtype=np.int16)
+    if kind == DATE:
+        return np.array([
+            NULL_DATE if v is None else (date.fromisoformat(v) if isinstance(v, str) else v).toordinal()
+            for v in values
+        ], dtype=np.int32)
+    if kind == DATETIME:
+        return np.array([
+            NULL_INT if v is None else to_micros(datetime.fromisoformat(v) if isinstance(v, str) else v)
+            for v in values
+        ], dtype=np.int64)
+    raise ValueError(f"{kind} is not a numeric column kind")
+
+
+class SampleRecord(MutableMapping):
+    """Dict-like view of one row of a CompactSampleStore; writes go to the columns"""
+
+    __slots__ = ("_store", "_position")
+
+    def __init__(self, store: "CompactSampleStore", position: int):
+        self._store = store
+        self._position = position
+
+    def __getitem__(self, key):
+        return self._store._get(self._position, key)
+
+    def __setitem__(self, key, value):
+        self._store._set(self._position, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("Sample fields cannot be deleted")
+
+    def __iter__(self):
+        yield from SAMPLE_FIELDS
+        yield from self._store._extras.get(self._position, ())
+
+    def __len__(self):
+        return len(SAMPLE_FIELDS) + len(self._store._extras.get(self._position, ()))
+
+    def __repr__(self):
+        return f"SampleRecord({dict(self)!r})"
+
+
+class CompactSampleStore:
+    """Column-oriented sample store for multi-million-row in-memory deployments.
+
+    Each field lives in one numpy column: status, priority and sample type as
+    int16 codes, dates as int32 ordinals, timestamps as int64 microseconds and
+    free text in a shared UTF-8 arena. Reads return plain dicts (or writable
+    SampleRecord views), so rows only become Python objects at the edge.
+    It offers the same interface as SampleList.
+
+    An updated string is written over its old bytes when it fits and appended
+    otherwise; once the bytes left behind exceed half an arena (and
+    arena_compaction_min) the arena is rewritten without them.
+    """
+
+    arena_compaction_min = 1 << 16
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self._size = 0
+        self._capacity = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        self._arenas = {name: bytearray() for name, kind in COLUMN_KINDS.items() if kind == STR}
+        self._dead_bytes = {name: 0 for name in self._arenas}
+        self._categories = {
+            "sample_type": Categorical(),
+            "priority": Categorical(p.value for p in SamplePriority),
+            "status": Categorical(s.value for s in SampleStatus),
+        }
+        self._extras: Dict[int, dict] = {}
+        # Ids normally arrive in increasing order and are found by binary search;
+        # this dict is only built once they stop doing so
+        self._id_positions: Optional[Dict[int, int]] = None
+        self._reserve(16)
+        self.extend(rows)
+
+    # Storage
+
+    def _column_dtypes(self):
+        for name, kind in COLUMN_KINDS.items():
+            if kind == STR:
+                yield f"{name}.start", np.int64
+                yield f"{name}.length", np.int32
+            elif kind == CATEGORY:
+                yield name, np.int16
+            elif kind == DATE:
+                yield name, np.int32
+            else:
+                yield name, np.int64
+
+    def _reserve(self, capacity: int):
+        if capacity <= self._capacity:
+            return
+        capacity = max(capacity, 2 * self._capacity)
+        for name, dtype in self._column_dtypes():
+            column = np.empty(capacity, dtype=dtype)
+            if name in self._columns:
+                column[:self._size] = self._columns[name][:self._size]
+            self._columns[name] = column
+        self._capacity = capacity
+
+    def _encode(self, name: str, values: list) -> np.ndarray:
+        return encode_column(COLUMN_KINDS[name], values, self._categories.get(name))
+
+    def _write(self, name: str, positions, values: list):
+        if COLUMN_KINDS[name] == STR:
+            arena = self._arenas[name]
+            encoded = [None if v is None else str(v).encode() for v in values]
+            lengths = np.array([-1 if e is None else len(e) for e in encoded], dtype=np.int32)
+            starts = len(arena) + np.concatenate(([0], np.cumsum(np.maximum(lengths, 0))[:-1]))
+            arena.extend(b"".join(e for e in encoded if e is not None))
+            self._columns[f"{name}.start"][positions] = starts
+            self._columns[f"{name}.length"][positions] = lengths
+        else:
+            self._columns[name][positions] = self._encode(name, values)
+
+    def _read(self, name: str, positions: np.ndarray) -> list:
+        kind = COLUMN_KINDS[name]
+        if kind == STR:
+            arena = self._arenas[name]
+            starts = self._columns[f"{name}.start"][positions].tolist()
+            lengths = self._columns[f"{name}.length"][positions].tolist()
+            return [None if n < 0 else arena[s:s + n].decode() for s, n in zip(starts, lengths)]
+        raw = self._columns[name][positions].tolist()
+        if kind == INT:
+            return [None if v == NULL_INT else v for v in raw]
+        if kind == CATEGORY:
+            values = self._categories[name].values
+            return [values[v] for v in raw]
+        if kind == DATE:
+            return [None if v == NULL_DATE else date.fromordinal(v) for v in raw]
+        return [None if v == NULL_INT else from_micros(v) for v in raw]
+
+    def _get(self, position: int, key: str):
+        if key in COLUMN_KINDS:
+            return self._read(key, np.array([position]))[0]
+        return self._extras[position][key]
+
+    def _set(self, position: int, key: str, value):
+        if key not in COLUMN_KINDS:
+            self._extras.setdefault(position, {})[key] = value
+            return
+        if COLUMN_KINDS[key] == STR:
+            self._set_string(key, position, value)
+            return
+        self._write(key, slice(position, position + 1), [value])
+        if key == "id":
+            self._index_ids_by_dict()
+
+    def _set_string(self, name: str, position: int, value):
+        arena = self._arenas[name]
+        starts, lengths = self._columns[f"{name}.start"], self._columns[f"{name}.length"]
+        old_length = max(int(lengths[position]), 0)
+        encoded = None if value is None else str(value).encode()
+        if encoded is not None and len(encoded) <= old_length:
+            start = int(starts[position])
+            arena[start:start + len(encoded)] = encoded
+            self._dead_bytes[name] += old_length - len(encoded)
+        else:
+            self._dead_bytes[name] += old_length
+            starts[position] = len(arena)
+            arena.extend(encoded or b"")
+        lengths[position] = -1 if encoded is None else len(encoded)
+        if self._dead_bytes[name] > max(self.arena_compaction_min, len(arena) // 2):
+            self._compact_arena(name)
+
+    def _compact_arena(self, name: str):
+        """Rewrite an arena with only the live strings, in row order"""
+        starts = self._columns[f"{name}.start"][:self._size]
+        lengths = np.maximum(self._columns[f"{name}.length"][:self._size], 0).astype(np.int64)
+        new_starts = np.cumsum(lengths) - lengths
+        source = np.frombuffer(bytes(self._arenas[name]), dtype=np.uint8)
+        gather = np.repeat(starts - new_starts, lengths) + np.arange(int(lengths.sum()))
+        self._arenas[name] = bytearray(source[gather].tobytes())
+        starts[:] = new_starts
+        self._dead_bytes[name] = 0
+
+    def _index_ids_by_dict(self):
+        ids = self._columns["id"][:self._size].tolist()
+        self._id_positions = {sample_id: position for position, sample_id in enumerate(ids)}
+
+    # List-like interface
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for position in range(self._size):
+            yield SampleRecord(self, position)
+
+    def __getitem__(self, position: int) -> SampleRecord:
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError("sample position out of range")
+        return SampleRecord(self, position)
+
+    def append(self, row: dict):
+        self.extend([row])
+
+    def extend(self, rows: Iterable[dict]):
+        rows = list(rows)
+        if not rows:
+            return
+        start, end = self._size, self._size + len(rows)
+        self._reserve(end)
+        for name in COLUMN_KINDS:
+            self._write(name, slice(start, end), [row.get(name) for row in rows])
+        for offset, row in enumerate(rows):
+            extras = {k: v for k, v in row.items() if k not in COLUMN_KINDS}
+            if extras:
+                self._extras[start + offset] = extras
+
+        ids = self._columns["id"][start:end]
+        if self._id_positions is not None:
+            self._id_positions.update((i, start + k) for k, i in enumerate(ids.tolist()))
+        elif np.any(np.diff(ids) <= 0) or (start and ids[0] <= self._columns["id"][start - 1]):
+            self._size = end
+            self._index_ids_by_dict()
+        self._size = end
+
+    def clear(self):
+        self.__init__()
+
+    # Queries
+
+    def _positions_of(self, sample_ids: Sequence[int]) -> np.ndarray:
+        wanted = np.asarray(list(sample_ids), dtype=np.int64)
+        if self._id_positions is not None:
+            return np.array([self._id_positions.get(i, -1) for i in wanted.tolist()], dtype=np.int64)
+        ids = self._columns["id"][:self._size]
+        positions = np.searchsorted(ids, wanted)
+        found = positions < self._size
+        found[found] = ids[positions[found]] == wanted[found]
+        return np.where(found, positions, -1)
+
+    def find(self, sample_id: int) -> Optional[SampleRecord]:
+        position = int(self._positions_of([sample_id])[0])
+        return None if position < 0 else SampleRecord(self, position)
+
+    def find_many(self, sample_ids: Iterable[int]) -> Dict[int, SampleRecord]:
+        sample_ids = list(sample_ids)
+        positions = self._positions_of(sample_ids).tolist()
+        return {i: SampleRecord(self, p) for i, p in zip(sample_ids, positions) if p >= 0}
+
+    def _mask(self, name: str, value) -> np.ndarray:
+        column = self._columns[name][:self._size]
+        if COLUMN_KINDS[name] == CATEGORY:
+            code = self._categories[name].codes.get(value.value if hasattr(value, "value") else value)
+            return np.zeros(self._size, dtype=bool) if code is None else column == code
+        return column == value
+
+    def rows(self, positions: np.ndarray, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        """Materialize rows as dicts, decoding only the requested fields"""
+        fields = tuple(fields or SAMPLE_FIELDS)
+        columns = [self._read(name, positions) for name in fields]
+        rows = [dict(zip(fields, values)) for values in zip(*columns)]
+        if self._extras and fields == SAMPLE_FIELDS:
+            for row, position in zip(rows, positions.tolist()):
+                row.update(self._extras.get(position, ()))
+        return rows
+
+    def filter(self, status=None, assigned_to=None, sample_type=None, ids=None, fields=None) -> List[dict]:
+        mask = np.ones(self._size, dtype=bool)
+        if ids is not None:
+            mask &= np.isin(self._columns["id"][:self._size], np.asarray(list(ids), dtype=np.int64))
+        if status is not None:
+            mask &= self._mask("status", status)
+        if assigned_to is not None:
+            mask &= self._mask("assigned_to", assigned_to)
+        if sample_type is not None:
+            mask &= self._mask("sample_type", sample_type)
+        return self.rows(np.flatnonzero(mask), fields)
+
+    def count_by(self, field: str) -> Dict[str, int]:
+        if COLUMN_KINDS.get(field) == CATEGORY:
+            counts = np.bincount(self._columns[field][:self._size], minlength=len(self._categories[field].values))
+            values = self._categories[field].values
+            return {values[code]: int(n) for code, n in enumerate(counts.tolist()) if n}
+        return dict(Counter(self._read(field, np.arange(self._size))))
+
+    def columns(self, fields: Sequence[str]) -> List[tuple]:
+        positions = np.arange(self._size)
+        return list(zip(*(self._read(name, positions) for name in fields)))
+
+    def coded_columns(self, fields: Sequence[str]) -> CodedColumns:
+        """Copies of the numeric columns, so later writes do not show through"""
+        codes = {name: self._columns[name][:self._size].copy() for name in fields}
+        labels = {name: list(self._categories[name].values) for name in fields if name in self._categories}
+        return codes, labels
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the columns, arenas and categorical dictionaries"""
+        return (
+            sum(column.nbytes for column in self._columns.values())
+            + sum(len(arena) for arena in self._arenas.values())
+            + sum(len(c.values) * 64 for c in self._categories.values())
+        )
+
+
+def make_sample_store(rows: Iterable[dict] = (), mode: Optional[str] = None):
+    """Build the sample store selected by SAMPLE_STORE (dict or compact)"""
+    mode = mode or os.getenv("SAMPLE_STORE", "dict")
+    if mode == "compact":
+        return CompactSampleStore(rows)
+    if mode == "dict":
+        return SampleList(rows)
+    raise ValueError(f"Unknown SAMPLE_STORE: {mode}")
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import string
+from datetime import date, datetime
+from threading import Lock
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+
+class MemoryBlockSource:
+    """Hands out id blocks from a counter shared by the threads of one process"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._next: Dict[str, int] = {}
+
+    def next_block(self, name: str, size: int, start: int = 1) -> int:
+        """Reserve `size` ids of a sequence and return the first one"""
+        with self._lock:
+            first = self._next.get(name, start)
+            self._next[name] = first + size
+            return first
+
+
+class FileBlockSource:
+    """Hands out id blocks from a JSON file guarded by an exclusive flock.
+
+    Safe across the worker processes of one host.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def next_block(self, name: str, size: int, start: int = 1) -> int:
+        import fcntl
+
+        with open(self.path, "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                content = handle.read()
+                counters = json.loads(content) if content else {}
+                first = counters.get(name, start)
+                counters[name] = first + size
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(counters))
+                handle.flush()
+                os.fsync(handle.fileno())
+                return first
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class DatabaseBlockSource:
+    """Hands out id blocks from the id_sequences table; safe across hosts.
+
+    Each block is one atomic UPDATE ... RETURNING, so workers never wait on
+    each other for longer than a single row update.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def next_block(self, name: str, size: int, start: int = 1) -> int:
+        while True:
+            with self.engine.begin() as connection:
+                row = connection.execute(
+                    text("UPDATE id_sequences SET next_value = next_value + :size "
+                         "WHERE name = :name RETURNING next_value"),
+                    {"size": size, "name": name},
+                ).first()
+                if row is not None:
+                    return row[0] - size
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        text("INSERT INTO id_sequences (name, next_value) VALUES (:name, :next_value)"),
+                        {"name": name, "next_value": start + size},
+                    )
+                return start
+            except IntegrityError:
+                # Another worker created the sequence first; take a block from it
+                continue
+
+
+class SequenceAllocator:
+    """Hi/lo id allocator: reserves blocks from a shared source, hands out ids locally.
+
+    Taking an id from the current block is a single range-iterator step, which
+    is atomic under the GIL, so threads only take the lock when a block runs out.
+    """
+
+    def __init__(self, source, name: str, block_size: int = 1000, start: int = 1):
+        self.source = source
+        self.name = name
+        self.block_size = block_size
+        self.start = start
+        self._lock = Lock()
+        self._block = iter(())
+
+    def next_id(self) -> int:
+        while True:
+            block = self._block
+            try:
+                return next(block)
+            except StopIteration:
+                with self._lock:
+                    # Only the first thread to find the block exhausted refills it
+                    if self._block is block:
+                        first = self.source.next_block(self.name, self.block_size, self.start)
+                        self._block = iter(range(first, first + self.block_size))
+
+
+class AccessionNumberGenerator:
+    """Formatted, collision-free accession numbers such as SAMP001.
+
+    With daily_reset the counter restarts every day and the date is part of
+    the number, e.g. SAMP20261019-0001.
+    """
+
+    def __init__(self, source, prefix: str = "SAMP", width: int = 3, daily_reset: bool = False,
+                 pattern: Optional[str] = None, block_size: int = 100, start: int = 1,
+                 today: Callable[[], date] = date.today):
+        self.source = source
+        self.prefix = prefix
+        self.width = width
+        self.daily_reset = daily_reset
+        self.pattern = pattern or (
+            "{prefix}{date:%Y%m%d}-{number:0{width}d}" if daily_reset else "{prefix}{number:0{width}d}"
+        )
+        self.block_size = block_size
+        self.start = start
+        self.today = today
+        self._lock = Lock()
+        self._allocators: Dict[str, SequenceAllocator] = {}
+        # First number of each day already taken by existing samples (daily_reset only)
+        self._day_starts: Dict[date, int] = {}
+        self._date_format = ""
+        self._reserved = re.compile(self._pattern_regex())
+
+    def _pattern_regex(self) -> str:
+        """Regex for every string the pattern could produce, whatever the date or number"""
+        parts = []
+        for literal, field, spec, _ in string.Formatter().parse(self.pattern):
+            parts.append(re.escape(literal))
+            spec = (spec or "").replace("{width}", str(self.width))
+            if field == "prefix":
+                parts.append(re.escape(self.prefix))
+            elif field == "date":
+                self._date_format = spec
+                parts.append(f"(?P<date>{_strftime_regex(spec)})")
+            elif field == "number":
+                padded = re.fullmatch(r"0(\d+)d", spec)
+                parts.append(f"(?P<number>\\d{{{padded.group(1)},}})" if padded else r"(?P<number>\d+)")
+            elif field is not None:
+                parts.append(r"\d+")
+        return "".join(parts)
+
+    def seed(self, values: Iterable[str]):
+        """Start numbering after the highest accession number among existing sample ids"""
+        for value in values:
+            match = self._reserved.fullmatch(value) if isinstance(value, str) else None
+            if match is None or "number" not in match.groupdict():
+                continue
+            following = int(match["number"]) + 1
+            if not self.daily_reset:
+                self.start = max(self.start, following)
+                continue
+            text = match.groupdict().get("date")
+            if text is None:
+                continue
+            try:
+                day = datetime.strptime(text, self._date_format).date() if self._date_format else date.fromisoformat(text)
+            except ValueError:
+                continue
+            self._day_starts[day] = max(self._day_starts.get(day, 1), following)
+
+    def _allocator(self, key: str, start: int) -> SequenceAllocator:
+        allocator = self._allocators.get(key)
+        if allocator is None:
+            with self._lock:
+                allocator = self._allocators.get(key)
+                if allocator is None:
+                    if self.daily_reset:
+                        # Drop the previous days' allocators
+                        self._allocators.clear()
+                    allocator = SequenceAllocator(self.source, key, self.block_size, start)
+                    self._allocators[key] = allocator
+        return allocator
+
+    def next_number(self) -> str:
+        if self.daily_reset:
+            day = self.today()
+            key = f"accession:{self.prefix}:{day:%Y%m%d}"
+            number = self._allocator(key, self._day_starts.get(day, 1)).next_id()
+        else:
+            day = None
+            number = self._allocator(f"accession:{self.prefix}", self.start).next_id()
+        return self.pattern.format(prefix=self.prefix, date=day, number=number, width=self.width)
+
+    def reserves(self, value: str) -> bool:
+        """Whether a value lies in the generated number space, so clients must not supply it"""
+        return self._reserved.fullmatch(value) is not None
+
+
+# strftime directives and what they can produce
+_STRFTIME_PATTERNS = {
+    "Y": r"\d{4}", "y": r"\d{2}", "m": r"\d{2}", "d": r"\d{2}", "j": r"\d{3}",
+    "H": r"\d{2}", "M": r"\d{2}", "S": r"\d{2}", "%": "%",
+}
+
+
+def _strftime_regex(spec: str) -> str:
+    """Regex for the dates a strftime format produces (ISO yyyy-mm-dd when there is none)"""
+    if not spec:
+        return r"\d{4}-\d{2}-\d{2}"
+    parts = re.split(r"(%.)", spec)
+    return "".join(
+        _STRFTIME_PATTERNS.get(part[1], ".+?") if part.startswith("%") and len(part) == 2 else re.escape(part)
+        for part in parts
+    )
+
+
+def block_source_from_env():
+    """Pick the block source configured by SEQUENCE_STORE (memory, database, or a file path)"""
+    store = os.getenv("SEQUENCE_STORE", "memory")
+    if store == "memory":
+        return MemoryBlockSource()
+    if store == "database":
+        from database import engine
+        return DatabaseBlockSource(engine)
+    return FileBlockSource(store)
@@ -1,7 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 client = TestClient(app)
 
@@ -94,6 +94,632 @@ class TestWithAuth:
         # but shows the structure for testing with authentication
         assert response.status_code in [201, 401]
 
+class TestSparseFieldsets:
+    def test_samples_only_requested_fields(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        response = client.get("/samples?fields=sample_id,status,priority", headers=headers)
+        assert response.status_code == 200
+        assert all(set(row) == {"sample_id", "status", "priority"} for row in response.json())
+
+    def test_fields_on_other_collections(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        for path, field in [("/inventory", "item_code"), ("/users", "email"), ("/tests", "test_name")]:
+            response = client.get(f"{path}?fields=id,{field}", headers=headers)
+            assert response.status_code == 200
+            assert all(set(row) == {"id", field} for row in response.json())
+
+    def test_unknown_field_rejected(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        response = client.get("/samples?fields=sample_id,password", headers=headers)
+        assert response.status_code == 400
+
+class TestSampleBatchUpdate:
+    def _create_samples(self, headers, count):
+        ids = []
+        for i in range(count):
+            payload = {**test_sample, "sample_id": f"BATCH-{datetime.now().timestamp()}-{i}"}
+            ids.append(client.post("/samples", json=payload, headers=headers).json()["id"])
+        return ids
+
+    def test_batch_items_applied(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        ids = self._create_samples(headers, 3)
+        items = [{"id": i, "update": {"status": "in_progress", "assigned_to": 2}} for i in ids]
+        response = client.patch("/samples/batch", json={"items": items}, headers=headers)
+        assert response.status_code == 200
+        assert {s["status"] for s in response.json()} == {"in_progress"}
+
+        batch = {"filter": {"ids": ids, "status": "in_progress"}, "update": {"status": "completed"}}
+        response = client.patch("/samples/batch", json=batch, headers=headers)
+        assert response.status_code == 200
+        assert sorted(s["id"] for s in response.json()) == sorted(ids)
+
+    def test_invalid_transition_rejects_whole_batch(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        ids = self._create_samples(headers, 2)
+        client.patch("/samples/batch", json={"items": [{"id": ids[0], "update": {"status": "cancelled"}}]}, headers=headers)
+        items = [{"id": i, "update": {"status": "in_progress"}} for i in ids]
+        response = client.patch("/samples/batch", json={"items": items}, headers=headers)
+        assert response.status_code == 409
+        samples = {s["id"]: s for s in client.get("/samples", headers=headers).json()}
+        assert samples[ids[1]]["status"] == "pending"
+
+    def test_null_status_and_priority_rejected(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        sample_id = self._create_samples(headers, 1)[0]
+        for update in ({"status": None}, {"priority": None}):
+            response = client.patch("/samples/batch", json={"items": [{"id": sample_id, "update": update}]}, headers=headers)
+            assert response.status_code == 422
+            batch = {"filter": {"ids": [sample_id]}, "update": update}
+            assert client.patch("/samples/batch", json=batch, headers=headers).status_code == 422
+        client.patch("/samples/batch", json={"items": [{"id": sample_id, "update": {"assigned_to": 2}}]}, headers=headers)
+        response = client.patch("/samples/batch", json={"items": [{"id": sample_id, "update": {"assigned_to": None}}]}, headers=headers)
+        assert response.status_code == 200 and response.json()[0]["assigned_to"] is None
+        response = client.get("/samples", headers=headers)
+        assert response.status_code == 200
+        sample = next(s for s in response.json() if s["id"] == sample_id)
+        assert (sample["status"], sample["priority"]) == ("pending", "normal")
+
+    def test_empty_filter_rejected(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        before = client.get("/samples", headers=headers).json()
+        for batch_filter in ({}, {"sample_type": ""}):
+            batch = {"filter": batch_filter, "update": {"priority": "low"}}
+            response = client.patch("/samples/batch", json=batch, headers=headers)
+            assert response.status_code == 400
+        assert client.get("/samples", headers=headers).json() == before
+
+class TestSampleAudit:
+    def test_history_records_field_changes(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        payload = {**test_sample, "sample_id": f"AUDIT-{datetime.now().timestamp()}"}
+        sample_id = client.post("/samples", json=payload, headers=headers).json()["id"]
+        client.put(f"/samples/{sample_id}", json={"status": "in_progress", "assigned_to": 2}, headers=headers)
+        client.put(f"/samples/{sample_id}", json={"status": "in_progress", "priority": "urgent"}, headers=headers)
+
+        response = client.get(f"/samples/{sample_id}/history", headers=headers)
+        assert response.status_code == 200
+        changes = [(e["field"], e["old_value"], e["new_value"]) for e in response.json()]
+        assert changes == [
+            ("status", "pending", "in_progress"),
+            ("assigned_to", None, 2),
+            ("priority", "normal", "urgent"),
+        ]
+        assert all(e["changed_by"] == 1 for e in response.json())
+
+    def test_time_window(self):
+        from audit import SampleAuditLog
+        log = SampleAuditLog()
+        t0 = datetime(2026, 1, 1, 8)
+        log.record(1, {"status": ("pending", "in_progress")}, 2, t0)
+        log.record(2, {"status": ("pending", "cancelled")}, 2, t0.replace(hour=9))
+        log.record(1, {"status": ("in_progress", "completed")}, 3, t0.replace(hour=10))
+        assert [e["sample_id"] for e in log.window(t0.replace(hour=9), t0.replace(hour=10))] == [2, 1]
+        assert [e["new_value"] for e in log.history(1, start=t0.replace(hour=9))] == ["completed"]
+
+    def test_list_and_dict_values(self):
+        from audit import SampleAuditLog
+        log = SampleAuditLog()
+        tags = ["a"]
+        log.record(1, {"tags": (None, tags), "meta": ({}, {"b": [1]})})
+        log.record(1, {"tags": (tags, ["a"])})
+        log.flush()
+        tags.append("mutated")
+        assert [(e["field"], e["new_value"]) for e in log.history(1)] == [
+            ("tags", ["a"]), ("meta", {"b": [1]}), ("tags", ["a"]),
+        ]
+        assert len(log.window()) == 3
+
+    def test_unencodable_writes_are_kept_not_dropped(self, caplog):
+        from audit import SampleAuditLog
+        log = SampleAuditLog()
+        looped = []
+        looped.append(looped)
+        log.record(1, {"status": ("pending", "in_progress")})
+        log.record("not-an-id", {"status": ("pending", "cancelled")})
+        log.record(2, {"notes": (None, looped)})
+        assert [e["sample_id"] for e in log.window()] == [1, 2]
+        assert [entries for _, _, entries in log.rejected] == [[("not-an-id", {"status": ("pending", "cancelled")})]]
+        assert "could not be recorded" in caplog.text
+
+    def test_list_update_and_aware_bounds_via_api(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        assert client.put("/samples/1", json={"tags": ["a"]}, headers=headers).status_code == 200
+        history = client.get("/samples/1/history?end=2999-01-01T00:00:00%2B02:00", headers=headers)
+        assert history.status_code == 200
+        assert history.json()[-1]["new_value"] == ["a"]
+        window = client.get("/audit/samples?start=2000-01-01T00:00:00Z", headers=headers)
+        assert window.status_code == 200
+
+    def test_threshold_flush_runs_off_the_writer(self):
+        import time
+        from audit import SampleAuditLog
+        log = SampleAuditLog(flush_threshold=10)
+        for i in range(10):
+            log.record(i, {"status": ("pending", "in_progress")})
+        deadline = time.monotonic() + 5
+        while log._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not log._pending
+        assert len(log) == 10
+
+class TestTurnaroundAnalytics:
+    def test_sketch_quantiles_within_relative_error(self):
+        import random
+        from analytics import QuantileSketch
+        rng = random.Random(1)
+        values = [rng.lognormvariate(2, 1) for _ in range(20000)]
+        left, right = QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(values):
+            (left if i % 2 else right).add(value)
+        left.merge(right)
+        values.sort()
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(left.quantile(q) - exact) <= 0.02 * exact
+
+    def test_window_merges_hourly_and_daily_buckets(self):
+        from datetime import timedelta
+        from analytics import TurnaroundTracker
+        tracker = TurnaroundTracker()
+        collected = datetime(2026, 3, 1)
+        for day in range(3):
+            for hours in (4, 8, 12):
+                completed = collected + timedelta(days=day, hours=hours)
+                tracker.record("hematology", "normal", completed - timedelta(hours=hours), completed)
+        window = tracker.summary(datetime(2026, 3, 1, 6), datetime(2026, 3, 3, 10))
+        assert window["overall"]["count"] == 7
+        assert tracker.summary()["overall"]["count"] == 9
+        assert tracker.summary(priority="urgent")["overall"]["count"] == 0
+
+    def test_aware_and_extreme_bounds(self):
+        from datetime import timezone
+        from analytics import TurnaroundTracker
+        tracker = TurnaroundTracker()
+        completed = datetime(2026, 3, 1, 12)
+        tracker.record("hematology", "normal", completed - timedelta(hours=6), completed)
+        assert tracker.summary(datetime(2026, 3, 1, tzinfo=timezone.utc))["overall"]["count"] == 1
+        assert tracker.summary(datetime.min, datetime.max)["overall"]["count"] == 1
+        assert TurnaroundTracker().summary(end=datetime.max)["overall"]["count"] == 0
+
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        response = client.get("/reports/turnaround?start=2026-10-19T00:00:00Z&end=9999-12-31T23:59:59", headers=headers)
+        assert response.status_code == 200
+
+    def test_turnaround_report_endpoint(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        response = client.post("/results", json={"sample_id": 1, "test_id": 1, "result_value": "5.1"}, headers=headers)
+        assert response.status_code == 201
+        report = client.get("/reports/turnaround", headers=headers).json()
+        assert report["by_test_type"]["hematology"]["count"] >= 1
+        assert report["overall"]["p50"] is not None
+
+def _allocate_ids(path, count, queue):
+    from sequences import FileBlockSource, SequenceAllocator
+    allocator = SequenceAllocator(FileBlockSource(path), "samples", block_size=500)
+    queue.put([allocator.next_id() for _ in range(count)])
+
+class TestSequenceAllocation:
+    def test_threads_never_collide(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from sequences import MemoryBlockSource, SequenceAllocator
+        allocator = SequenceAllocator(MemoryBlockSource(), "samples", block_size=64)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            batches = list(pool.map(lambda _: [allocator.next_id() for _ in range(20000)], range(8)))
+        ids = [i for batch in batches for i in batch]
+        assert len(set(ids)) == len(ids) == 160000
+
+    def test_processes_never_collide(self, tmp_path):
+        import multiprocessing
+        queue = multiprocessing.Queue()
+        path = str(tmp_path / "sequences.json")
+        workers = [multiprocessing.Process(target=_allocate_ids, args=(path, 20000, queue)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        ids = [i for _ in workers for i in queue.get(timeout=60)]
+        for worker in workers:
+            worker.join()
+        assert len(set(ids)) == len(ids) == 80000
+
+    def test_accession_numbers_reset_daily(self):
+        from datetime import timedelta
+        from sequences import AccessionNumberGenerator, MemoryBlockSource
+        today = [date(2026, 10, 19)]
+        generator = AccessionNumberGenerator(MemoryBlockSource(), prefix="BLD", width=4,
+                                             daily_reset=True, today=lambda: today[0])
+        assert [generator.next_number(), generator.next_number()] == ["BLD20261019-0001", "BLD20261019-0002"]
+        today[0] += timedelta(days=1)
+        assert generator.next_number() == "BLD20261020-0001"
+
+    def test_create_sample_assigns_accession_number(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        payload = {key: value for key, value in test_sample.items() if key != "sample_id"}
+        first = client.post("/samples", json=payload, headers=headers).json()
+        second = client.post("/samples", json=payload, headers=headers).json()
+        assert first["sample_id"].startswith("SAMP")
+        assert first["sample_id"] != second["sample_id"]
+        assert first["id"] != second["id"]
+
+    def test_generated_format_is_reserved(self):
+        from sequences import AccessionNumberGenerator, MemoryBlockSource
+        plain = AccessionNumberGenerator(MemoryBlockSource())
+        daily = AccessionNumberGenerator(MemoryBlockSource(), prefix="BLD", daily_reset=True)
+        assert plain.reserves(plain.next_number()) and plain.reserves("SAMP12345")
+        assert daily.reserves(daily.next_number())
+        assert not plain.reserves("SAMP-EXT-1") and not plain.reserves("TEST001")
+
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        response = client.post("/samples", json={**test_sample, "sample_id": "SAMP002"}, headers=headers)
+        assert response.status_code == 400
+        assert client.put("/samples/1", json={"sample_id": "SAMP999"}, headers=headers).status_code == 400
+        payload = {key: value for key, value in test_sample.items() if key != "sample_id"}
+        generated = client.post("/samples", json=payload, headers=headers).json()["sample_id"]
+        ids = [s["sample_id"] for s in client.get("/samples", headers=headers).json()]
+        assert ids.count(generated) == 1
+
+    def test_daily_format_reserves_only_its_own_ids(self):
+        from datetime import date
+        from sequences import AccessionNumberGenerator, MemoryBlockSource
+        daily = AccessionNumberGenerator(MemoryBlockSource(), prefix="SAMP", width=4, daily_reset=True,
+                                         today=lambda: date(2026, 10, 19))
+        assert daily.next_number() == "SAMP20261019-0001"
+        assert daily.reserves("SAMP20261019-0001") and daily.reserves("SAMP20250101-12345")
+        for client_id in ("SAMPLE-7", "SAMP-EXT-1", "SAMPLE-2026-001", "SAMP2026-0001", "SAMP20261019-01"):
+            assert not daily.reserves(client_id)
+
+    def test_seeded_from_highest_existing_number(self):
+        from datetime import date
+        from sequences import AccessionNumberGenerator, MemoryBlockSource
+        plain = AccessionNumberGenerator(MemoryBlockSource())
+        plain.seed(["SAMP002", "SAMP005", "SAMP-EXT-9", "BLOOD-77"])
+        assert plain.next_number() == "SAMP006"
+
+        daily = AccessionNumberGenerator(MemoryBlockSource(), daily_reset=True, today=lambda: date(2026, 10, 19))
+        daily.seed(["SAMP20261019-004", "SAMP20261018-010"])
+        assert daily.next_number() == "SAMP20261019-005"
+
+class TestResponseCache:
+    def test_concurrent_requests_share_one_computation(self):
+        import asyncio
+        import time
+        from caching import ResponseCache
+        cache = ResponseCache(ttl=60)
+
+        def slow_stats():
+            time.sleep(0.05)
+            return {"total": 1}
+
+        async def burst():
+            calls = [cache.get_or_compute("/dashboard/stats", {"b": 1, "a": None}, "admin", slow_stats)
+                     for _ in range(10)]
+            results = await asyncio.gather(*calls)
+            await cache.get_or_compute("/dashboard/stats", {"b": "1"}, "admin", slow_stats)
+            cache.invalidate()
+            await cache.get_or_compute("/dashboard/stats", {"b": 1}, "admin", slow_stats)
+            return results
+
+        results = asyncio.run(burst())
+        assert all(r == {"total": 1} for r in results)
+        assert cache.stats()["/dashboard/stats"] == {"hits": 1, "coalesced": 9, "computes": 2}
+
+    def test_leader_cancellation_does_not_cancel_followers(self):
+        import asyncio
+        import time
+        from caching import ResponseCache
+        cache = ResponseCache(ttl=60)
+
+        def slow_stats():
+            time.sleep(0.1)
+            return {"total": 1}
+
+        async def scenario():
+            leader = asyncio.ensure_future(cache.get_or_compute("/dashboard/stats", None, "admin", slow_stats))
+            await asyncio.sleep(0.01)
+            followers = [cache.get_or_compute("/dashboard/stats", None, "admin", slow_stats) for _ in range(3)]
+            leader.cancel()
+            return await asyncio.gather(*followers)
+
+        assert asyncio.run(scenario()) == [{"total": 1}] * 3
+        assert cache.stats()["/dashboard/stats"]["computes"] == 1
+
+    def test_request_after_invalidate_does_not_join_earlier_computation(self):
+        import asyncio
+        import time
+        from caching import ResponseCache
+        cache = ResponseCache(ttl=60)
+        store = {"total": 1}
+
+        def slow_stats():
+            snapshot = dict(store)
+            time.sleep(0.05)
+            return snapshot
+
+        async def scenario():
+            before = asyncio.ensure_future(cache.get_or_compute("/dashboard/stats", None, "admin", slow_stats))
+            await asyncio.sleep(0.01)
+            store["total"] = 2
+            cache.invalidate()
+            after = await cache.get_or_compute("/dashboard/stats", None, "admin", slow_stats)
+            cached = await cache.get_or_compute("/dashboard/stats", None, "admin", slow_stats)
+            return await before, after, cached
+
+        assert asyncio.run(scenario()) == ({"total": 1}, {"total": 2}, {"total": 2})
+        assert cache.stats()["/dashboard/stats"] == {"hits": 1, "coalesced": 0, "computes": 2}
+        assert not cache._inflight
+
+    def test_entries_are_bounded(self):
+        import asyncio
+        from caching import ResponseCache
+        cache = ResponseCache(ttl=60, max_entries=50)
+
+        async def burst():
+            for day in range(500):
+                await cache.get_or_compute("/reports/samples", {"start_date": day}, "admin", lambda: {"day": day})
+
+        asyncio.run(burst())
+        assert len(cache._entries) == 50
+        assert [key[1] for key in cache._entries][-1] == (("start_date", "499"),)
+
+        expiring = ResponseCache(ttl=0.01)
+
+        async def expire():
+            await expiring.get_or_compute("/reports/samples", {"start_date": 1}, "admin", dict)
+            await asyncio.sleep(0.02)
+            await expiring.get_or_compute("/reports/samples", {"start_date": 2}, "admin", dict)
+
+        asyncio.run(expire())
+        assert len(expiring._entries) == 1
+
+    def test_mutation_invalidates_dashboard(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        before = client.get("/dashboard/stats", headers=headers).json()["total_samples"]
+        payload = {**test_sample, "sample_id": f"CACHE-{datetime.now().timestamp()}"}
+        client.post("/samples", json=payload, headers=headers)
+        assert client.get("/dashboard/stats", headers=headers).json()["total_samples"] == before + 1
+        assert "/dashboard/stats" in client.get("/cache/stats", headers=headers).json()
+
+class TestReportJobs:
+    def _wait(self, headers, job_id):
+        import time
+        for _ in range(200):
+            job = client.get(f"/reports/jobs/{job_id}", headers=headers).json()
+            if job["status"] in ("completed", "failed"):
+                return job
+            time.sleep(0.05)
+        raise AssertionError("report job did not finish")
+
+    def test_job_runs_and_identical_request_is_cached(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        request = {"kind": "by_type", "start_date": "2000-01-01", "end_date": str(date.today())}
+        response = client.post("/reports/jobs", json=request, headers=headers)
+        assert response.status_code == 202
+        job = self._wait(headers, response.json()["id"])
+        assert job["status"] == "completed"
+
+        result = client.get(f"/reports/jobs/{job['id']}/result", headers=headers).json()
+        assert result["total_samples"] == sum(sum(c.values()) for c in result["by_type"].values())
+
+        again = client.post("/reports/jobs", json=request, headers=headers).json()
+        assert again["cached"] is True and again["status"] == "completed"
+
+    def test_mutation_changes_data_version(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        first = client.post("/reports/jobs", json={"kind": "samples"}, headers=headers).json()
+        self._wait(headers, first["id"])
+        payload = {**test_sample, "sample_id": f"JOB-{datetime.now().timestamp()}"}
+        client.post("/samples", json=payload, headers=headers)
+        second = client.post("/reports/jobs", json={"kind": "samples"}, headers=headers).json()
+        assert second["data_version"] > first["data_version"]
+        assert second["cached"] is False
+
+    def test_single_spawned_pool_and_bounded_jobs(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from reports import ReportJobManager
+        manager = ReportJobManager(max_workers=1, max_jobs=3)
+        with ThreadPoolExecutor(max_workers=8) as threads:
+            pools = list(threads.map(lambda _: manager._pool(), range(8)))
+        assert all(pool is pools[0] for pool in pools)
+        assert pools[0]._mp_context.get_start_method() == "spawn"
+        manager.shutdown()
+
+        key = manager.artifact_key("samples", {}, 1)
+        manager._artifacts[key] = b""
+        jobs = [manager.submit("samples", {}, 1, list) for _ in range(5)]
+        assert list(manager._jobs) == [job["id"] for job in jobs[-3:]]
+
+    def test_report_payload_is_coded_columns(self):
+        import pickle
+        import numpy as np
+        from reports import build_report, sample_columns
+        from sample_store import CompactSampleStore, SampleList
+        rows = [
+            {"id": i, "sample_id": f"R{i}", "patient_name": "P", "sample_type": ("blood", "urine")[i % 2],
+             "collection_date": date(2026, 10, i), "priority": "normal", "status": ("pending", "completed")[i % 3 == 0],
+             "assigned_to": None if i % 2 else 2, "created_at": datetime.now(), "updated_at": datetime.now()}
+            for i in range(1, 10)
+        ]
+        params = {"start_date": "2026-10-02", "end_date": "2026-10-08"}
+        for store in (SampleList(rows), CompactSampleStore(rows)):
+            columns = sample_columns(store)
+            assert all(isinstance(column, np.ndarray) for column in columns[0].values())
+            by_technician = build_report("by_technician", params, pickle.loads(pickle.dumps(columns)))
+            assert by_technician["total_samples"] == 7
+            assert by_technician["by_technician"] == {"2": {"pending": 3, "completed": 1}, "None": {"pending": 2, "completed": 1}}
+            samples = build_report("samples", {}, columns)
+            assert samples["samples_by_type"] == {"urine": 5, "blood": 4}
+            assert samples["samples_by_status"] == {"pending": 6, "completed": 3}
+
+class TestInventoryForecast:
+    def test_rates_and_stockout_projection(self):
+        from forecasting import ConsumptionForecaster
+        forecaster = ConsumptionForecaster(window_days=28, short_window_days=7, lead_time_days=7)
+        start = datetime(2026, 3, 1, 9)
+        for day in range(28):
+            forecaster.observe(1, -10, start + timedelta(days=day))
+            forecaster.observe(2, -2 if day < 21 else -30, start + timedelta(days=day))
+            forecaster.observe(2, +50, start + timedelta(days=day))
+        items = [
+            {"id": 1, "item_code": "A", "item_name": "Steady", "quantity": 100, "min_threshold": 10},
+            {"id": 2, "item_code": "B", "item_name": "Surging", "quantity": 250, "min_threshold": 10},
+            {"id": 3, "item_code": "C", "item_name": "Unused", "quantity": 5, "min_threshold": 10},
+        ]
+        steady, surging, unused = forecaster.forecast(items, today=date(2026, 3, 28))
+        assert steady["daily_consumption"] == 10
+        assert steady["days_to_stockout"] == 10
+        assert steady["suggested_reorder_point"] == 70
+        # The 7 day window dominates once use jumps
+        assert surging["daily_consumption"] == 30
+        assert surging["reorder_now"] is True
+        assert unused["days_to_stockout"] is None
+
+    def test_old_days_roll_out_of_the_window(self):
+        from forecasting import ConsumptionForecaster
+        forecaster = ConsumptionForecaster(window_days=7, short_window_days=7)
+        forecaster.observe(1, -70, datetime(2026, 3, 1))
+        item = {"id": 1, "item_code": "A", "item_name": "A", "quantity": 10, "min_threshold": 1}
+        assert forecaster.forecast([item], today=date(2026, 3, 7))[0]["daily_consumption"] == 10
+        assert forecaster.forecast([item], today=date(2026, 3, 8))[0]["daily_consumption"] == 0
+
+    def test_stockout_beyond_calendar_has_no_date(self):
+        from forecasting import ConsumptionForecaster
+        forecaster = ConsumptionForecaster(window_days=28)
+        forecaster.observe(1, 0, datetime(2026, 3, 1))
+        forecaster.observe(1, -1, datetime(2026, 3, 28))
+        deep = {"id": 1, "item_code": "D", "item_name": "D", "quantity": 1_000_000, "min_threshold": 1}
+        forecast = forecaster.forecast([deep], today=date(2026, 3, 28))[0]
+        assert forecast["days_to_stockout"] > 5_000_000
+        assert forecast["projected_stockout_date"] is None
+
+    def test_empty_or_negative_stock_has_no_days_left(self):
+        import warnings
+        from forecasting import ConsumptionForecaster
+        forecaster = ConsumptionForecaster(window_days=7)
+        forecaster.observe(1, -2, datetime(2026, 3, 1))
+        items = [
+            {"id": 1, "item_code": "N", "item_name": "N", "quantity": -1, "min_threshold": 1},
+            {"id": 2, "item_code": "Z", "item_name": "Z", "quantity": 0, "min_threshold": 1},
+            {"id": 3, "item_code": "S", "item_name": "S", "quantity": 5, "min_threshold": 1},
+        ]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            negative, empty, still = forecaster.forecast(items, today=date(2026, 3, 1))
+        assert negative["days_to_stockout"] == 0 and negative["projected_stockout_date"] == date(2026, 3, 1)
+        assert empty["days_to_stockout"] == 0 and empty["daily_consumption"] == 0
+        assert still["days_to_stockout"] is None
+
+    def test_forecast_endpoint_follows_outward_updates(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        item = {**test_inventory_item, "item_code": f"FC-{datetime.now().timestamp()}", "quantity": 100}
+        item_id = client.post("/inventory", json=item, headers=headers).json()["id"]
+        client.put(f"/inventory/{item_id}?quantity_change=-40", headers=headers)
+        forecast = {f["item_id"]: f for f in client.get("/inventory/forecast", headers=headers).json()}
+        assert forecast[item_id]["daily_consumption"] == 40
+        assert forecast[item_id]["days_to_stockout"] == 1.5
+
+class TestCompactSampleStore:
+    def _rows(self):
+        now = datetime(2026, 10, 19, 8, 30)
+        return [
+            {"id": i, "sample_id": f"SAMP{i:03d}", "patient_name": f"Patient {i}", "sample_type": "blood",
+             "collection_date": date(2026, 10, i), "priority": "normal", "status": "pending",
+             "assigned_to": None if i % 2 else 2, "created_at": now, "updated_at": now}
+            for i in range(1, 6)
+        ]
+
+    def test_round_trip_and_queries_match_dict_store(self):
+        from sample_store import CompactSampleStore, SampleList
+        compact, plain = CompactSampleStore(self._rows()), SampleList(self._rows())
+        assert [dict(s) for s in compact] == list(plain)
+        assert compact.filter(assigned_to=2) == plain.filter(assigned_to=2)
+        assert compact.filter(status="pending", fields=("id",)) == [{"id": i} for i in range(1, 6)]
+        assert compact.count_by("status") == plain.count_by("status")
+        assert compact.columns(("status", "assigned_to")) == plain.columns(("status", "assigned_to"))
+
+    def test_record_writes_go_to_columns(self):
+        from sample_store import CompactSampleStore
+        store = CompactSampleStore(self._rows())
+        record = store.find(3)
+        record.update({"status": "completed", "assigned_to": 7})
+        assert store.filter(status="completed") == [dict(record)]
+        assert store.count_by("status") == {"pending": 4, "completed": 1}
+        assert store.find(42) is None
+        store.append({**self._rows()[0], "id": 0, "sample_id": "SAMP000"})
+        assert set(store.find_many([0, 3, 42])) == {0, 3}
+
+    def test_string_updates_do_not_grow_the_arena(self):
+        from sample_store import CompactSampleStore
+        store = CompactSampleStore(self._rows())
+        store.find(1)["patient_name"] = "x" * 1024
+        size = len(store._arenas["patient_name"])
+        for _ in range(3):
+            store.find(1)["patient_name"] = "y" * 1024
+        assert len(store._arenas["patient_name"]) == size
+
+        store.arena_compaction_min = 4096
+        for i in range(200):
+            store.find(2)["patient_name"] = "z" * (1000 + i)
+        assert len(store._arenas["patient_name"]) < 4 * 4096
+        assert store.find(2)["patient_name"] == "z" * 1199
+        assert store.find(1)["patient_name"] == "y" * 1024
+        assert [s["patient_name"] for s in store.filter(ids=[3, 4, 5])] == ["Patient 3", "Patient 4", "Patient 5"]
+
+class TestSampleFullView:
+    def test_concurrent_loads_share_one_batch(self):
+        import asyncio
+        from loaders import BatchLoader
+        calls = []
+
+        def fetch(keys):
+            calls.append(list(keys))
+            return {key: key * 10 for key in keys if key != 3}
+
+        async def run():
+            loader = BatchLoader(fetch)
+            first = await asyncio.gather(loader.load_many([1, 2, 3]), loader.load(2), loader.load(4))
+            second = await loader.load_many([1, 4])
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == [[10, 20, None], 20, 40]
+        assert second == [10, 40]
+        assert calls == [[1, 2, 3, 4]]
+
+    def test_sample_with_results_and_tests(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        payload = {**test_sample, "sample_id": f"FULL-{datetime.now().timestamp()}"}
+        sample_id = client.post("/samples", json=payload, headers=headers).json()["id"]
+        for value in ("4.9", "5.3"):
+            client.post("/results", json={"sample_id": sample_id, "test_id": 1, "result_value": value}, headers=headers)
+
+        response = client.get(f"/samples/{sample_id}/full", headers=headers)
+        assert response.status_code == 200
+        full = response.json()
+        assert [r["result_value"] for r in full["results"]] == ["4.9", "5.3"]
+        assert {r["test"]["test_name"] for r in full["results"]} == {"Complete Blood Count"}
+
+        response = client.get(f"/samples/full?ids={sample_id},999999,1", headers=headers)
+        assert response.status_code == 200
+        assert [s["id"] for s in response.json()] == [sample_id, 1]
+        assert len(response.json()[0]["results"]) == 2
+
+    def test_free_form_test_type_and_status(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        test = client.post("/tests", json={"test_name": "Lipids", "test_type": "chemistry"}, headers=headers).json()
+        payload = {**test_sample, "sample_id": f"FULL-{datetime.now().timestamp()}"}
+        sample_id = client.post("/samples", json=payload, headers=headers).json()["id"]
+        client.put(f"/samples/{sample_id}", json={"status": "on_hold"}, headers=headers)
+        client.post("/results", json={"sample_id": sample_id, "test_id": test["id"], "result_value": "1"}, headers=headers)
+
+        response = client.get(f"/samples/{sample_id}/full", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "on_hold"
+        assert response.json()["results"][0]["test"]["test_type"] == "chemistry"
+
+    def test_missing_and_malformed_ids(self):
+        headers = {"Authorization": f"Bearer {get_mock_token()}"}
+        assert client.get("/samples/999999/full", headers=headers).status_code == 404
+        assert client.get("/samples/full?ids=1,x", headers=headers).status_code == 400
+
 # Integration tests
 class TestIntegration:
     def test_api_documentation_available(self):
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+
+# The in-memory stores keep naive local datetimes (datetime.now()), and the
+# compact ones encode them as int64 microseconds from this naive epoch, which
+# avoids the local-time conversion of datetime.timestamp() on the write path
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def naive_local(moment: datetime) -> datetime:
+    """Convert a timezone-aware datetime (e.g. a ?start=...Z bound) to naive local time"""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def to_micros(moment: datetime) -> int:
+    return (naive_local(moment) - EPOCH) // MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    return EPOCH + timedelta(microseconds=micros)